@@ -0,0 +1,24 @@
+import copy
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+
+@lru_cache(maxsize=None)
+def _parse_yaml(config_path: str):
+    with open(config_path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def load_yaml_cached(config_path: Path):
+    """Parse a crew YAML config once per process and return a private copy"""
+    # CrewBase rewrites the loaded configs in place (agents, tools, context), so
+    # every crew instance needs its own copy of the parsed file
+    return copy.deepcopy(_parse_yaml(str(config_path)))
+
+
+def cached_config(cls):
+    """Class decorator applied on top of @CrewBase to cache its agents/tasks YAML"""
+    cls.load_yaml = staticmethod(load_yaml_cached)
+    return cls
@@ -1,19 +1,30 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from typing import List, Optional
 
+from multisql.crews.config_cache import cached_config
+from multisql.models.outputs import QueryIntent, SchemaElements
+from multisql.tools.output_parser import RepairingConverter
+from multisql.tools.scheduled_llm import scheduled_llm
+
+@cached_config
 @CrewBase
 class NLUnderstandingCrew():
     """Natural Language Understanding Crew"""
 
     agents: List[BaseAgent]
     tasks: List[Task]
+
+    def __init__(self, model: Optional[str] = None):
+        # Model picked for this crew by the flow's tiering; None keeps agents.yaml
+        self.model = model
     
     @agent
     def intent_analyzer(self) -> Agent:
         return Agent(
             config=self.agents_config['intent_analyzer'],
+            llm=scheduled_llm(self.agents_config['intent_analyzer'], stage='intent_analyzer', model=self.model),
             verbose=True
         )
 
@@ -21,6 +32,7 @@ class NLUnderstandingCrew():
     def schema_explorer(self) -> Agent:
         return Agent(
             config=self.agents_config['schema_explorer'],
+            llm=scheduled_llm(self.agents_config['schema_explorer'], stage='schema_explorer', model=self.model),
             verbose=True
         )
 
@@ -28,12 +40,16 @@ class NLUnderstandingCrew():
     def analyze_intent_task(self) -> Task:
         return Task(
             config=self.tasks_config['analyze_intent'],
+            output_pydantic=QueryIntent,
+            converter_cls=RepairingConverter
         )
 
     @task
     def identify_schema_elements_task(self) -> Task:
         return Task(
             config=self.tasks_config['identify_schema_elements'],
+            output_pydantic=SchemaElements,
+            converter_cls=RepairingConverter
         )
 
     @crew
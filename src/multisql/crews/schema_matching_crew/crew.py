@@ -1,19 +1,30 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from typing import List, Optional
 
+from multisql.crews.config_cache import cached_config
+from multisql.models.outputs import RelationshipAnalysis, SchemaMatches
+from multisql.tools.output_parser import RepairingConverter
+from multisql.tools.scheduled_llm import scheduled_llm
+
+@cached_config
 @CrewBase
 class SchemaMatchingCrew():
     """Schema Matching Crew"""
 
     agents: List[BaseAgent]
     tasks: List[Task]
+
+    def __init__(self, model: Optional[str] = None):
+        # Model picked for this crew by the flow's tiering; None keeps agents.yaml
+        self.model = model
     
     @agent
     def relationship_analyst(self) -> Agent:
         return Agent(
             config=self.agents_config['relationship_analyst'],
+            llm=scheduled_llm(self.agents_config['relationship_analyst'], stage='relationship_analyst', model=self.model),
             verbose=True
         )
 
@@ -21,6 +32,7 @@ class SchemaMatchingCrew():
     def semantic_matcher(self) -> Agent:
         return Agent(
             config=self.agents_config['semantic_matcher'],
+            llm=scheduled_llm(self.agents_config['semantic_matcher'], stage='semantic_matcher', model=self.model),
             verbose=True
         )
 
@@ -28,12 +40,16 @@ class SchemaMatchingCrew():
     def analyze_relationships_task(self) -> Task:
         return Task(
             config=self.tasks_config['analyze_relationships'],
+            output_pydantic=RelationshipAnalysis,
+            converter_cls=RepairingConverter
         )
 
     @task
     def perform_semantic_matching_task(self) -> Task:
         return Task(
             config=self.tasks_config['perform_semantic_matching'],
+            output_pydantic=SchemaMatches,
+            converter_cls=RepairingConverter
         )
 
     @crew
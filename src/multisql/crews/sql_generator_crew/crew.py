@@ -1,19 +1,30 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from typing import List, Optional
 
+from multisql.crews.config_cache import cached_config
+from multisql.models.outputs import GeneratedSQL
+from multisql.tools.output_parser import RepairingConverter
+from multisql.tools.scheduled_llm import scheduled_llm
+
+@cached_config
 @CrewBase
 class SQLGeneratorCrew():
     """SQL Generator Crew"""
 
     agents: List[BaseAgent]
     tasks: List[Task]
+
+    def __init__(self, model: Optional[str] = None):
+        # Model picked for this crew by the flow's tiering; None keeps agents.yaml
+        self.model = model
     
     @agent
     def sql_composer(self) -> Agent:
         return Agent(
             config=self.agents_config['sql_composer'],
+            llm=scheduled_llm(self.agents_config['sql_composer'], stage='sql_composer', model=self.model),
             verbose=True
         )
 
@@ -21,6 +32,7 @@ class SQLGeneratorCrew():
     def sql_optimizer(self) -> Agent:
         return Agent(
             config=self.agents_config['sql_optimizer'],
+            llm=scheduled_llm(self.agents_config['sql_optimizer'], stage='sql_optimizer', model=self.model),
             verbose=True
         )
 
@@ -28,12 +40,16 @@ class SQLGeneratorCrew():
     def compose_sql_task(self) -> Task:
         return Task(
             config=self.tasks_config['compose_sql'],
+            output_pydantic=GeneratedSQL,
+            converter_cls=RepairingConverter
         )
 
     @task
     def optimize_sql_task(self) -> Task:
         return Task(
             config=self.tasks_config['optimize_sql'],
+            output_pydantic=GeneratedSQL,
+            converter_cls=RepairingConverter
         )
 
     @crew
@@ -1,43 +1,136 @@
 from typing import Dict, Any
+import functools
 import time
-from crewai.flow.flow import Flow, listen, router, start
+import uuid
+from crewai.flow.flow import Flow, listen, or_, router, start
 
-from multisql.models.state import NL2SQLState
+from multisql.models.state import NL2SQLState, DatabaseSchema
+from multisql.models.outputs import QueryIntent, SchemaElements, RelationshipAnalysis, SchemaMatches, GeneratedSQL
 from multisql.crews.nl_understanding_crew.crew import NLUnderstandingCrew
 from multisql.crews.schema_matching_crew.crew import SchemaMatchingCrew
 from multisql.crews.sql_generator_crew.crew import SQLGeneratorCrew
 from multisql.tools.complexity_analyzer import ComplexityAnalyzer
+from multisql.tools.database_catalog import get_catalog
+from multisql.tools.example_store import get_example_store, format_examples
+from multisql.tools.llm_scheduler import llm_usage
+from multisql.tools.checkpoint_store import CheckpointStore
+from multisql.tools.model_tiering import get_model_tiering
+from multisql.tools.output_parser import task_output
+from multisql.tools.performance_tracker import total_latency
+from multisql.tools.result_streamer import QueryStream
+from multisql.tools.schema_manager import SchemaManager
+
+def checkpointed(stage):
+    """
+    Make a flow stage idempotent and checkpoint the state after it
+
+    A stage recorded in `completed_stages` (restored from a checkpoint) is
+    not run again; its recorded return value is returned instead, so routers
+    take the same branch on resume. Apply below the flow decorators.
+    """
+    @functools.wraps(stage)
+    def wrapper(self, *args):
+        return self._run_step(stage.__name__, lambda: stage(self, *args))
+    return wrapper
 
 class NL2SQLFlow(Flow[NL2SQLState]):
     """
     Main flow controlling the entire NL to SQL conversion process
     """
     
+    # Stream of the remaining result batches after execute_sql (kept out of the state)
+    result_stream = None
+    _checkpoints = None
+    
+    def _run_step(self, name, step):
+        """Run a stage or sub-step once per run, checkpointing the state after it"""
+        if self.state.checkpoint_path and self._checkpoints is None:
+            self._resume()
+        if name in self.state.completed_stages:
+            return self.state.completed_stages[name]
+        
+        # Count the LLM calls, queueing and throttling of the run per agent
+        with llm_usage(self.state.llm_stats):
+            result = step()
+        
+        self.state.completed_stages[name] = result
+        if self._checkpoints is not None:
+            self._checkpoints.save(self.state.run_id, name, self.state.model_dump(mode="json"))
+        return result
+    
+    def _resume(self):
+        """Open the checkpoint store and restore the state of an earlier attempt of this run"""
+        self._checkpoints = CheckpointStore(self.state.checkpoint_path)
+        if not self.state.run_id:
+            self.state.run_id = uuid.uuid4().hex
+            return
+        
+        saved = self._checkpoints.load(self.state.run_id)
+        if saved:
+            restored = NL2SQLState.model_validate(saved)
+            for field in NL2SQLState.model_fields:
+                setattr(self.state, field, getattr(restored, field))
+    
     @start()
-    def understand_query(self):
-        """Starting phase: understand the natural language query"""
+    @checkpointed
+    def retrieve_database(self):
+        """Starting phase: pick the database(s) that can answer the query"""
+        start_time = time.time()
+        self.state.execution_path.append("retrieve_database")
+        
+        if self.state.db_schema is None:
+            if not self.state.db_dir:
+                raise ValueError("Either db_schema or db_dir must be provided")
+            
+            # Rank all cached databases against the query
+            catalog = get_catalog(self.state.db_dir, self.state.schema_cache_path)
+            self.state.candidate_databases = catalog.rank(self.state.nl_query)
+            self.state.db_ids = catalog.select_databases(
+                self.state.candidate_databases,
+                max_databases=self.state.max_databases
+            )
+            if not self.state.db_ids:
+                raise ValueError(f"No database matches the query: {self.state.nl_query}")
+            
+            # Several databases are answered together through ATTACH DATABASE
+            self.state.db_schema = DatabaseSchema(
+                **catalog.schema_manager.get_federated_schema(self.state.db_ids)
+            )
+        elif not self.state.db_ids:
+            self.state.db_ids = [self.state.db_schema.db_id]
+        
+        end_time = time.time()
+        self.state.execution_time["retrieve_database"] = end_time - start_time
+        
+        return "database_retrieved"
+    
+    @listen(retrieve_database)
+    @checkpointed
+    def understand_query(self, _):
+        """Understand the natural language query"""
         start_time = time.time()
         self.state.execution_path.append("understand_query")
         
         # Use NL Understanding Crew to parse query intent
-        nl_understanding_crew = NLUnderstandingCrew()
+        nl_understanding_crew = NLUnderstandingCrew(model=self._select_model("understand_query"))
         result = nl_understanding_crew.crew().kickoff(
             inputs={
                 "nl_query": self.state.nl_query,
-                "db_schema": self.state.db_schema
+                "db_schema": self.state.db_schema.model_dump()
             }
         )
         
-        # Update state
-        self.state.parsed_intent = result.intent
-        self.state.tables_involved = result.tables
+        # Update state from the structured task outputs
+        self.state.parsed_intent = task_output(result, 0, QueryIntent).model_dump()
+        self.state.tables_involved = self._schema_tables(task_output(result, 1, SchemaElements).tables)
         
         end_time = time.time()
         self.state.execution_time["understand_query"] = end_time - start_time
         
         return "query_understood"
     
-    @listen(event="query_understood")
+    @listen(understand_query)
+    @checkpointed
     def evaluate_complexity(self, _):
         """Evaluate query complexity"""
         start_time = time.time()
@@ -59,6 +152,19 @@ class NL2SQLFlow(Flow[NL2SQLState]):
         
         return "complexity_evaluated"
     
+    def _schema_tables(self, tables):
+        """Map table names from an LLM answer to schema table names, dropping unknown ones"""
+        known = {table.name.lower(): table.name for table in self.state.db_schema.tables}
+        # Federated schemas qualify tables (db_id.table); accept the bare table name too
+        for table in self.state.db_schema.tables:
+            known.setdefault(table.name.split(".")[-1].lower(), table.name)
+        resolved = []
+        for table in tables:
+            name = known.get(table.strip().strip('"`').lower())
+            if name and name not in resolved:
+                resolved.append(name)
+        return resolved
+    
     def _calculate_joins_needed(self):
         """Calculate number of JOIN operations needed"""
         if len(self.state.tables_involved) <= 1:
@@ -67,8 +173,59 @@ class NL2SQLFlow(Flow[NL2SQLState]):
         # Based on table relationship graph, calculate minimum JOINs needed
         # Simplified version: tables count - 1 (minimum spanning tree)
         return len(self.state.tables_involved) - 1
+
+    def _select_model(self, stage):
+        """Pick the model tier for a stage from the current complexity score"""
+        tier, model = get_model_tiering().select(
+            stage,
+            complexity_score=self.state.complexity_score,
+            intent=self.state.parsed_intent,
+            joins_needed=self.state.joins_needed
+        )
+        self.state.model_tiers[stage] = tier
+        return model
+    
+    def _schema_summary(self):
+        """Compact `table(column, ...)` listing of the schema for the SQL generator prompts"""
+        return "\n".join(
+            f"{table.name}({', '.join(column.name for column in table.columns)})"
+            for table in self.state.db_schema.tables
+        )
+    
+    def _schema_matching_summary(self):
+        """Joins and column matches found by schema matching, one per line"""
+        if not self.state.schema_matching_result:
+            return "none"
+        lines = [
+            f"join {join['from_table']}.{join['from_column']} = {join['to_table']}.{join['to_column']}"
+            for join in self.state.schema_matching_result.get("joins", [])
+        ]
+        lines += [
+            f"'{match['phrase']}' -> {match['table']}.{match['column']} ({match['confidence']:.2f})"
+            for match in self.state.schema_matching_result.get("matches", [])
+        ]
+        return "\n".join(lines) or "none"
+    
+    def _retrieve_examples(self):
+        """Retrieve verified examples similar to the query for the SQL composer prompt"""
+        if not self.state.example_store_path:
+            return format_examples([])
+        
+        start_time = time.time()
+        store = get_example_store(self.state.example_store_path)
+        if self.state.performance_log_path:
+            store.refresh(self.state.performance_log_path)
+        self.state.few_shot_examples = store.search(
+            self.state.nl_query,
+            k=self.state.few_shot_k,
+            db_id=self.state.db_schema.db_id
+        )
+        self.state.execution_time["example_retrieval"] = time.time() - start_time
+        
+        return format_examples(self.state.few_shot_examples)
     
-    @listen(event="complexity_evaluated")
+    @listen(evaluate_complexity)
+    @checkpointed
     def make_routing_decision(self, _):
         """Make routing decision based on complexity and table relationships"""
         start_time = time.time()
@@ -91,81 +248,99 @@ class NL2SQLFlow(Flow[NL2SQLState]):
         
         return route
     
-    @router(router_function=lambda self, state, route: route)
+    @router(make_routing_decision)
+    @checkpointed
     def route_processing(self, route):
         """Route to appropriate processing flow"""
         self.state.execution_path.append(f"routed_to_{route}")
         return route
     
-    @listen(event="route_to_standard")
+    @listen("route_to_standard")
+    @checkpointed
     def standard_processing(self, _):
         """Standard processing flow (without schema matching)"""
         start_time = time.time()
         self.state.execution_path.append("standard_processing")
         
         # Directly use SQL generator
-        generator_crew = SQLGeneratorCrew()
+        generator_crew = SQLGeneratorCrew(model=self._select_model("sql_generation"))
         result = generator_crew.crew().kickoff(
             inputs={
                 "nl_query": self.state.nl_query,
                 "intent": self.state.parsed_intent,
-                "db_schema": self.state.db_schema,
-                "tables_involved": self.state.tables_involved
+                "db_schema": self._schema_summary(),
+                "tables_involved": self.state.tables_involved,
+                "schema_matching": self._schema_matching_summary(),
+                "few_shot_examples": self._retrieve_examples()
             }
         )
         
-        self.state.generated_sql = result.sql
+        self.state.generated_sql = task_output(result, -1, GeneratedSQL).sql
         
         end_time = time.time()
         self.state.execution_time["standard_processing"] = end_time - start_time
         
         return "processing_complete"
     
-    @listen(event="route_to_enhanced")
+    @listen("route_to_enhanced")
+    @checkpointed
     def enhanced_processing(self, _):
         """Enhanced processing flow (using schema matching)"""
-        start_time = time.time()
-        self.state.execution_path.append("enhanced_processing")
+        # A resumed run may have completed schema matching already
+        if "enhanced_processing" not in self.state.execution_path:
+            self.state.execution_path.append("enhanced_processing")
         
-        # Step 1: Use Schema Matching Crew
+        # Each step is checkpointed, so a failed generation does not repeat schema matching
+        self._run_step("schema_matching", self._match_schema)
+        self._run_step("sql_generation_enhanced", self._generate_enhanced_sql)
+        
+        self.state.execution_time["enhanced_processing"] = (
+            self.state.execution_time["schema_matching"] + self.state.execution_time["sql_generation_enhanced"]
+        )
+        
+        return "processing_complete"
+    
+    def _match_schema(self):
+        """Enhanced step 1: Use Schema Matching Crew"""
         matcher_start = time.time()
-        matcher_crew = SchemaMatchingCrew()
+        matcher_crew = SchemaMatchingCrew(model=self._select_model("schema_matching"))
         match_result = matcher_crew.crew().kickoff(
             inputs={
                 "nl_query": self.state.nl_query,
                 "intent": self.state.parsed_intent,
-                "db_schema": self.state.db_schema,
+                "db_schema": self.state.db_schema.model_dump(),
                 "tables_involved": self.state.tables_involved
             }
         )
         
-        self.state.schema_matching_result = match_result.matches
+        self.state.schema_matching_result = {
+            "joins": [join.model_dump() for join in task_output(match_result, 0, RelationshipAnalysis).joins],
+            "matches": [match.model_dump() for match in task_output(match_result, 1, SchemaMatches).matches]
+        }
         matcher_end = time.time()
         self.state.execution_time["schema_matching"] = matcher_end - matcher_start
-        
-        # Step 2: Use SQL Generator with schema matching results
+    
+    def _generate_enhanced_sql(self):
+        """Enhanced step 2: Use SQL Generator with schema matching results"""
         generator_start = time.time()
-        generator_crew = SQLGeneratorCrew()
+        generator_crew = SQLGeneratorCrew(model=self._select_model("sql_generation"))
         gen_result = generator_crew.crew().kickoff(
             inputs={
                 "nl_query": self.state.nl_query,
                 "intent": self.state.parsed_intent,
-                "db_schema": self.state.db_schema,
+                "db_schema": self._schema_summary(),
                 "tables_involved": self.state.tables_involved,
-                "schema_matching": self.state.schema_matching_result
+                "schema_matching": self._schema_matching_summary(),
+                "few_shot_examples": self._retrieve_examples()
             }
         )
         
-        self.state.generated_sql = gen_result.sql
+        self.state.generated_sql = task_output(gen_result, -1, GeneratedSQL).sql
         generator_end = time.time()
         self.state.execution_time["sql_generation_enhanced"] = generator_end - generator_start
-        
-        end_time = time.time()
-        self.state.execution_time["enhanced_processing"] = end_time - start_time
-        
-        return "processing_complete"
     
-    @listen(event="processing_complete")
+    @listen(or_(standard_processing, enhanced_processing))
+    @checkpointed
     def validate_sql(self, _):
         """Validate the generated SQL"""
         start_time = time.time()
@@ -177,18 +352,78 @@ class NL2SQLFlow(Flow[NL2SQLState]):
         end_time = time.time()
         self.state.execution_time["validate_sql"] = end_time - start_time
         
+        return "sql_validated"
+    
+    # Not checkpointed: an open result stream cannot be restored, and re-executing is cheap
+    @listen(validate_sql)
+    def execute_sql(self, _):
+        """Execute the SQL and fetch the first page of results, leaving the rest to stream"""
+        if not self.state.execute:
+            return self._complete_run()
+        
+        start_time = time.time()
+        self.state.execution_path.append("execute_sql")
+        
+        try:
+            self.result_stream = self.open_result_stream()
+            first_batch = self.result_stream.next_batch()
+            self.state.result_preview = {
+                **(first_batch.to_dict() if first_batch else {"columns": self.result_stream.columns, "num_rows": 0}),
+                "truncated": self.result_stream.truncated
+            }
+            self.state.execution_success = True
+        except Exception as e:
+            self.result_stream = None
+            self.state.execution_success = False
+            self.state.execution_error = str(e)
+        
+        end_time = time.time()
+        self.state.execution_time["execute_sql"] = end_time - start_time
+        
+        return self._complete_run()
+    
+    def _complete_run(self):
+        """Drop the checkpoint of the finished run and prepare the final output"""
+        if self._checkpoints is not None:
+            self._checkpoints.delete(self.state.run_id)
         return self._prepare_final_output()
     
+    def open_result_stream(self, **options):
+        """
+        Open a batched result stream for the generated SQL
+        
+        Parameters:
+            options: QueryStream options overriding the state's max_rows and batch_size
+        
+        Returns:
+            QueryStream owning its read-only connection
+        """
+        if not self.state.db_dir:
+            raise ValueError("db_dir is required to execute the SQL")
+        
+        schema_manager = SchemaManager(db_path=self.state.db_dir)
+        conn = schema_manager.connect(self.state.db_ids, check_same_thread=False)
+        return QueryStream(conn, self.state.generated_sql, **{
+            "max_rows": self.state.max_rows,
+            "batch_size": self.state.batch_size,
+            **options
+        })
+    
     def _prepare_final_output(self):
         """Prepare final output"""
-        total_time = sum(self.state.execution_time.values())
+        total_time = total_latency(self.state.execution_time)
         
         result = {
             "nl_query": self.state.nl_query,
+            "db_ids": self.state.db_ids,
             "sql": self.state.generated_sql,
             "complexity_score": self.state.complexity_score,
             "schema_matching_used": self.state.needs_schema_matching,
             "execution_path": self.state.execution_path,
+            "model_tiers": self.state.model_tiers,
+            "result_preview": self.state.result_preview,
+            "execution_success": self.state.execution_success,
+            "execution_error": self.state.execution_error,
             "execution_time": {
                 "total": total_time,
                 **self.state.execution_time
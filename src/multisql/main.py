@@ -1,18 +1,17 @@
 #!/usr/bin/env python
 import sys
+import json
+import time
 import warnings
 import argparse
+import uuid
 from datetime import datetime
 
-from multisql.crew import Multisql
-from multisql.flow import NL2SQLFlow
-from multisql.models.state import NL2SQLState, DatabaseSchema
-from multisql.tools.schema_manager import SchemaManager
-from multisql.tools.performance_tracker import PerformanceTracker
-
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-# This main file supports both the original crew and the NL2SQL flow
+# This main file supports both the original crew and the NL2SQL flow.
+# crewai, the crews, the flow and pydantic models take seconds to import, so they
+# are imported inside the commands that need them and --help stays fast.
 
 def run():
     """
@@ -23,10 +22,15 @@ def run():
         sys.argv.remove("--nl2sql")  # Remove the flag
         run_nl2sql()
     else:
+        parser = argparse.ArgumentParser(description="MultiSQL - NL to SQL translation system")
+        parser.add_argument("--nl2sql", action="store_true", help="Run the NL to SQL flow (see --nl2sql --help)")
+        parser.parse_known_args()
         run_original_crew()
 
 def run_original_crew(topic="AI LLMs"):
     """Run the original multisql crew."""
+    from multisql.crew import Multisql
+
     inputs = {
         'topic': topic,
         'current_year': str(datetime.now().year)
@@ -37,15 +41,29 @@ def run_original_crew(topic="AI LLMs"):
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
-def run_nl2sql():
-    """Run the NL2SQL flow."""
-    parser = argparse.ArgumentParser(description="Natural Language to SQL Conversion System")
+def _add_nl2sql_arguments(parser):
     parser.add_argument("--query", type=str, help="Natural language query")
     parser.add_argument("--db-id", type=str, help="Database ID")
     parser.add_argument("--db-dir", type=str, default="./spider/database", help="Database directory")
     parser.add_argument("--schema-cache", type=str, default="./schema_cache.json", help="Schema cache file")
-    
-    args = parser.parse_args()
+    parser.add_argument("--max-databases", type=int, default=2, help="Databases a question may span when --db-id is omitted")
+    parser.add_argument("--execute", action="store_true", help="Execute the generated SQL and stream its results")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Maximum number of result rows to stream")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per streamed result batch")
+    parser.add_argument("--checkpoints", type=str, default="flow_checkpoints.sqlite", help="Flow state checkpoint store")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="Resume a failed run from its last completed stage")
+
+def run_nl2sql(args=None):
+    """Run the NL2SQL flow."""
+    if args is None:
+        parser = argparse.ArgumentParser(description="Natural Language to SQL Conversion System")
+        _add_nl2sql_arguments(parser)
+        args = parser.parse_args()
+
+    from multisql.flow import NL2SQLFlow
+    from multisql.models.state import NL2SQLState, DatabaseSchema
+    from multisql.tools.schema_manager import SchemaManager
+    from multisql.tools.performance_tracker import PerformanceTracker
     
     # If no query provided, use default
     if not args.query:
@@ -54,85 +72,427 @@ def run_nl2sql():
         print(f"Using default query: '{query}'")
     else:
         query = args.query
-        db_id = args.db_id or "default_db"
+        db_id = args.db_id
     
     try:
         # Schema manager
         schema_manager = SchemaManager(db_path=args.db_dir, schema_cache_path=args.schema_cache)
         
-        # Get database schema - simplified for demo
-        # In production, you would use schema_manager.get_database_schema(db_id)
-        db_schema = {
-            "db_id": db_id,
-            "tables": [
-                {
-                    "name": "employees",
-                    "columns": [
-                        {"name": "id", "type": "int", "table": "employees"},
-                        {"name": "name", "type": "text", "table": "employees"},
-                        {"name": "salary", "type": "int", "table": "employees"}
-                    ]
-                }
-            ]
-        }
+        if args.query and db_id:
+            db_schema = schema_manager.get_database_schema(db_id)
+        elif args.query:
+            # No database given: the flow retrieves it from the catalog of all databases
+            db_schema = None
+        else:
+            # Demo schema for the default query
+            db_schema = {
+                "db_id": db_id,
+                "tables": [
+                    {
+                        "name": "employees",
+                        "columns": [
+                            {"name": "id", "type": "int", "table": "employees"},
+                            {"name": "name", "type": "text", "table": "employees"},
+                            {"name": "salary", "type": "int", "table": "employees"}
+                        ]
+                    }
+                ]
+            }
         
-        # Initialize state
+        # Initialize state; a resumed run restores the rest from its checkpoint
+        run_id = args.resume or uuid.uuid4().hex
         state = NL2SQLState(
+            run_id=run_id,
+            checkpoint_path=args.checkpoints,
             nl_query=query,
-            db_schema=DatabaseSchema(**db_schema)
+            db_schema=DatabaseSchema(**db_schema) if db_schema else None,
+            db_dir=args.db_dir,
+            schema_cache_path=args.schema_cache,
+            max_databases=args.max_databases,
+            execute=args.execute,
+            max_rows=args.max_rows,
+            batch_size=args.batch_size
         )
         
         # Create and run flow
-        flow = NL2SQLFlow(state=state)
-        result = flow.kickoff()
+        flow = NL2SQLFlow()
+        try:
+            result = flow.kickoff(inputs=state.model_dump())
+        except Exception:
+            print(f"Run {run_id} failed; resume it with --resume {run_id}")
+            raise
         
         # Display results
         print("\n= Processing Results =")
         print(f"Natural Language Query: {query}")
+        print(f"Databases: {', '.join(result['db_ids'])}")
         print(f"Generated SQL: {result['sql']}")
         print(f"Complexity Score: {result['complexity_score']:.2f}")
         print(f"Schema Matching Used: {'Yes' if result['schema_matching_used'] else 'No'}")
         print(f"Execution Path: {', '.join(result['execution_path'])}")
+        print(f"Model Tiers: {', '.join(f'{stage}={tier}' for stage, tier in result['model_tiers'].items())}")
+        
+        if args.execute:
+            _print_results(flow)
         
         # Record performance
-        tracker = PerformanceTracker()
-        tracker.log_performance(state)
+        tracker = PerformanceTracker(log_file=flow.state.performance_log_path)
+        tracker.log_performance(flow.state, execution_success=flow.state.execution_success)
+
+        return result
     except Exception as e:
         raise Exception(f"An error occurred while running the NL2SQL flow: {e}")
 
-def train():
+def _print_results(flow):
+    """Print the first page of results, then the remaining batches as they stream in"""
+    if not flow.state.execution_success:
+        print(f"Execution failed: {flow.state.execution_error}")
+        return
+
+    preview = flow.state.result_preview
+    print(f"\n= Results ({flow.state.execution_time['execute_sql'] * 1000:.1f} ms to first page) =")
+    print(" | ".join(preview["columns"]))
+    for row in zip(*preview.get("data", {}).values()):
+        print(" | ".join(str(value) for value in row))
+
+    stream = flow.result_stream
+    for batch in stream:
+        for row in batch.rows():
+            print(" | ".join(str(value) for value in row))
+    truncated = f" (stopped: {stream.truncated})" if stream.truncated else ""
+    print(f"{stream.rows_streamed} rows in {stream.batches} batches{truncated}")
+
+def _add_checkpoints_arguments(parser):
+    parser.add_argument("--checkpoints", type=str, default="flow_checkpoints.sqlite", help="Flow state checkpoint store")
+    parser.add_argument("--limit", type=int, default=20, help="Number of runs to list")
+    parser.add_argument("--delete", type=str, metavar="RUN_ID", help="Delete the checkpoint of a run")
+    parser.add_argument("--prune-days", type=float, help="Delete checkpoints not updated for this many days")
+
+def checkpoints(args=None):
+    """
+    List the checkpoints of failed runs that can be resumed, and remove stale ones.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Flow state checkpoints of unfinished runs")
+        _add_checkpoints_arguments(parser)
+        args = parser.parse_args()
+
+    from multisql.tools.checkpoint_store import CheckpointStore
+
+    try:
+        store = CheckpointStore(args.checkpoints)
+        if args.delete:
+            store.delete(args.delete)
+            print(f"Deleted the checkpoint of run {args.delete}")
+        if args.prune_days is not None:
+            removed = store.prune(args.prune_days * 86400)
+            print(f"Pruned {removed} checkpoints older than {args.prune_days:g} days")
+
+        runs = store.list_runs(limit=args.limit)
+        if not runs:
+            print("No unfinished runs")
+        for run in runs:
+            updated = datetime.fromtimestamp(run["updated_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{run['run_id']}  {updated}  last completed stage: {run['stage']}")
+    except Exception as e:
+        raise Exception(f"An error occurred while managing checkpoints: {e}")
+
+def _add_evaluate_arguments(parser):
+    parser.add_argument("--dataset", type=str, required=True, help="Spider dataset (dev.json) or gold file (dev_gold.sql)")
+    parser.add_argument("--predictions", type=str, default="performance_logs.jsonl", help="Prediction file (one SQL per line) or performance log")
+    parser.add_argument("--db-dir", type=str, default="./spider/database", help="Database directory")
+    parser.add_argument("--gold-cache", type=str, default="./gold_cache.json", help="Gold result cache file")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-query timeout in seconds")
+    parser.add_argument("--output", type=str, help="Write the full JSON report to this file")
+
+def evaluate(args=None):
+    """
+    Evaluate predicted SQL against a Spider dataset.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Spider evaluation of generated SQL")
+        _add_evaluate_arguments(parser)
+        args = parser.parse_args()
+
+    from multisql.tools.spider_evaluator import SpiderEvaluator, attach_predictions, format_report, load_spider_examples
+
+    try:
+        examples = attach_predictions(load_spider_examples(args.dataset), args.predictions)
+        evaluator = SpiderEvaluator(
+            db_path=args.db_dir,
+            gold_cache_path=args.gold_cache,
+            max_workers=args.workers,
+            timeout=args.timeout
+        )
+        report = evaluator.evaluate(examples)
+
+        print(format_report(report))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+    except Exception as e:
+        raise Exception(f"An error occurred while evaluating: {e}")
+
+def _add_catalog_arguments(parser):
+    parser.add_argument("--query", type=str, help="Rank databases for this natural language query")
+    parser.add_argument("--db-dir", type=str, default="./spider/database", help="Database directory")
+    parser.add_argument("--schema-cache", type=str, default="./schema_cache.json", help="Schema cache file")
+    parser.add_argument("--top-k", type=int, default=5, help="Number of candidate databases to show")
+
+def catalog(args=None):
+    """
+    Build the database catalog index and optionally rank databases for a query.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Database catalog for multi-database routing")
+        _add_catalog_arguments(parser)
+        args = parser.parse_args()
+
+    from multisql.tools.database_catalog import DatabaseCatalog
+    from multisql.tools.schema_manager import SchemaManager
+
+    try:
+        schema_manager = SchemaManager(db_path=args.db_dir, schema_cache_path=args.schema_cache)
+        start_time = time.perf_counter()
+        db_catalog = DatabaseCatalog.from_schema_manager(schema_manager)
+        print(f"Catalog of {len(db_catalog.databases)} databases loaded in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+        if args.query:
+            start_time = time.perf_counter()
+            candidates = db_catalog.rank(args.query, top_k=args.top_k)
+            lookup_ms = (time.perf_counter() - start_time) * 1000
+            for candidate in candidates:
+                print(f"  {candidate['db_id']:<30} {candidate['score']:6.2f}  tables: {', '.join(candidate['tables'])}")
+            print(f"Selected: {', '.join(db_catalog.select_databases(candidates))} ({lookup_ms:.2f} ms)")
+    except Exception as e:
+        raise Exception(f"An error occurred while building the catalog: {e}")
+
+def _add_examples_arguments(parser):
+    parser.add_argument("--store", type=str, default="few_shot_examples.jsonl", help="Example store file")
+    parser.add_argument("--harvest", type=str, metavar="LOG", help="Add successful runs from a performance log")
+    parser.add_argument("--import-spider", type=str, metavar="JSON", help="Add the gold pairs of a Spider split (e.g. train_spider.json)")
+    parser.add_argument("--query", type=str, help="Show the examples retrieved for this natural language query")
+    parser.add_argument("--db-id", type=str, help="Database of the query")
+    parser.add_argument("--k", type=int, default=3, help="Number of examples to retrieve")
+
+def examples(args=None):
+    """
+    Fill the few-shot example store and show the examples retrieved for a query.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Few-shot example store for SQL generation")
+        _add_examples_arguments(parser)
+        args = parser.parse_args()
+
+    from multisql.tools.example_store import ExampleStore, format_examples
+
+    try:
+        store = ExampleStore(args.store)
+        if args.harvest:
+            print(f"Harvested {store.harvest(args.harvest)} examples from {args.harvest}")
+        if args.import_spider:
+            with open(args.import_spider, "r") as f:
+                added = sum(
+                    store.add(item["question"], item["query"], item["db_id"]) for item in json.load(f)
+                )
+            print(f"Imported {added} examples from {args.import_spider}")
+        print(f"{len(store.examples)} examples in {args.store}")
+
+        if args.query:
+            start_time = time.perf_counter()
+            found = store.search(args.query, k=args.k, db_id=args.db_id)
+            print(f"Retrieved {len(found)} examples in {(time.perf_counter() - start_time) * 1000:.2f} ms\n")
+            print(format_examples(found))
+    except Exception as e:
+        raise Exception(f"An error occurred while updating the example store: {e}")
+
+def _add_loadtest_arguments(parser):
+    parser.add_argument("--qps", type=float, default=2.0, help="Target queries per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to generate load for")
+    parser.add_argument("--concurrency", type=int, default=8, help="Flows running at the same time")
+    parser.add_argument("--questions", type=str, help="JSON list of {question, db_id, kind} (Spider files work); generated from the schemas when omitted")
+    parser.add_argument("--complex-ratio", type=float, help="Share of complex questions in the mix")
+    parser.add_argument("--retrieve", action="store_true", help="Let the flow retrieve the database instead of using the question's db_id")
+    parser.add_argument("--db-dir", type=str, default="./spider/database", help="Database directory")
+    parser.add_argument("--schema-cache", type=str, default="./schema_cache.json", help="Schema cache file")
+    parser.add_argument("--max-databases", type=int, default=20, help="Databases to generate questions for")
+    parser.add_argument("--latency", type=str, default="lognormal", choices=["constant", "uniform", "lognormal"], help="Stub LLM latency distribution")
+    parser.add_argument("--latency-median-ms", type=float, default=500.0, help="Median stub LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread of the stub LLM latency")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of stub LLM calls answered with HTTP 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub LLM calls answered with HTTP 500")
+    parser.add_argument("--execute", action="store_true", help="Also execute the generated SQL")
+    parser.add_argument("--priority", type=str, default="interactive", choices=["interactive", "batch"], help="LLM scheduler priority of the flows' calls")
+    parser.add_argument("--log-file", type=str, default="loadtest_logs.jsonl", help="Performance log the flows append to")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between RSS/thread/fd samples")
+    parser.add_argument("--seed", type=int, help="Random seed for arrivals, question mix and stub behavior")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+
+def loadtest(args=None):
+    """
+    Drive the NL2SQL flow at a target QPS against a local stub LLM and report
+    throughput, tail latency, error rates and resource usage over time.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Load and soak test of the NL2SQL flow")
+        _add_loadtest_arguments(parser)
+        args = parser.parse_args()
+
+    import contextlib
+    import os
+    from multisql.flow import NL2SQLFlow
+    from multisql.models.state import NL2SQLState, DatabaseSchema
+    from multisql.tools.schema_manager import SchemaManager
+    from multisql.tools.performance_tracker import PerformanceTracker
+    from multisql.tools.llm_scheduler import Priority, get_scheduler, llm_priority
+    from multisql.tools.load_tester import (
+        LatencyDistribution, StubLLMServer, LoadGenerator, default_questions, format_load_report
+    )
+
+    try:
+        schema_manager = SchemaManager(db_path=args.db_dir, schema_cache_path=args.schema_cache)
+        if args.questions:
+            with open(args.questions, "r") as f:
+                questions = json.load(f)
+        else:
+            db_ids = schema_manager.list_databases()[:args.max_databases]
+            questions = default_questions(db_ids, {
+                db_id: [table["name"] for table in schema_manager.get_database_schema(db_id)["tables"]]
+                for db_id in db_ids
+            })
+
+        tracker = PerformanceTracker(log_file=args.log_file)
+
+        def run_query(question):
+            db_schema = None
+            if question.get("db_id") and not args.retrieve:
+                db_schema = DatabaseSchema(**schema_manager.get_database_schema(question["db_id"]))
+            state = NL2SQLState(
+                nl_query=question["question"],
+                db_schema=db_schema,
+                db_dir=args.db_dir,
+                schema_cache_path=args.schema_cache,
+                execute=args.execute,
+                performance_log_path=args.log_file
+            )
+            flow = NL2SQLFlow()
+            try:
+                with llm_priority(Priority[args.priority.upper()]):
+                    result = flow.kickoff(inputs=state.model_dump())
+            finally:
+                if flow.result_stream is not None:
+                    flow.result_stream.close()
+            tracker.log_performance(flow.state, execution_success=flow.state.execution_success)
+            return result
+
+        latency = LatencyDistribution(args.latency, args.latency_median_ms / 1000, args.latency_sigma, seed=args.seed)
+        stub = StubLLMServer(latency, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, seed=args.seed)
+        with stub:
+            os.environ["MULTISQL_LLM_BASE_URL"] = stub.base_url
+            os.environ.setdefault("OPENAI_API_KEY", "stub")
+            generator = LoadGenerator(
+                run_query, questions, qps=args.qps, duration=args.duration, concurrency=args.concurrency,
+                complex_ratio=args.complex_ratio, sample_interval=args.sample_interval, seed=args.seed
+            )
+            print(f"Running {args.duration:.0f} s at {args.qps} QPS with {len(questions)} questions...")
+            # Agents print their reasoning; keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                report = generator.run()
+            report["llm"] = dict(stub.stats)
+            report["scheduler"] = get_scheduler().stage_stats()
+    except Exception as e:
+        raise Exception(f"An error occurred while running the load test: {e}")
+
+    print(format_load_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+def _add_explain_arguments(parser):
+    _add_nl2sql_arguments(parser)
+    parser.add_argument("--sql", type=str, help="SQL to explain; generated from --query when omitted")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+def explain(args=None):
+    """
+    Explain the query plan of generated SQL and report full scans and missing indexes.
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(description="Query plan analysis of generated SQL")
+        _add_explain_arguments(parser)
+        args = parser.parse_args()
+
+    if not args.db_id:
+        raise SystemExit("explain requires --db-id")
+    if not args.sql and not args.query:
+        raise SystemExit("explain requires --sql or --query")
+
+    from multisql.tools.query_plan_analyzer import QueryPlanAnalyzer, format_plan_report
+
+    sql = args.sql
+    if not sql:
+        sql = run_nl2sql(args)["sql"]
+
+    try:
+        report = QueryPlanAnalyzer(db_path=args.db_dir).explain(args.db_id, sql)
+    except Exception as e:
+        raise Exception(f"An error occurred while explaining the query: {e}")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_plan_report(report))
+    return report
+
+def train(iterations=None, filename=None):
     """
     Train the crew for a given number of iterations.
     """
+    from multisql.crew import Multisql
+
     inputs = {
         "topic": "AI LLMs",
         'current_year': str(datetime.now().year)
     }
     try:
-        Multisql().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        Multisql().crew().train(
+            n_iterations=iterations if iterations is not None else int(sys.argv[1]),
+            filename=filename or sys.argv[2],
+            inputs=inputs
+        )
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
 
-def replay():
+def replay(task_id=None):
     """
     Replay the crew execution from a specific task.
     """
+    from multisql.crew import Multisql
+
     try:
-        Multisql().crew().replay(task_id=sys.argv[1])
+        Multisql().crew().replay(task_id=task_id or sys.argv[1])
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
 
-def test():
+def test(iterations=None, eval_llm=None):
     """
     Test the crew execution and returns the results.
     """
+    from multisql.crew import Multisql
+
     inputs = {
         "topic": "AI LLMs",
         "current_year": str(datetime.now().year)
     }
     
     try:
-        Multisql().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        Multisql().crew().test(
+            n_iterations=iterations if iterations is not None else int(sys.argv[1]),
+            eval_llm=eval_llm or sys.argv[2],
+            inputs=inputs
+        )
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
     
@@ -147,15 +507,45 @@ def main():
     
     # NL2SQL parser
     nl2sql_parser = subparsers.add_parser("nl2sql", help="Run the NL to SQL translation flow")
-    nl2sql_parser.add_argument("--query", type=str, help="Natural language query")
-    nl2sql_parser.add_argument("--db-id", type=str, help="Database ID")
-    nl2sql_parser.add_argument("--db-dir", type=str, default="./spider/database", help="Database directory")
-    nl2sql_parser.add_argument("--schema-cache", type=str, default="./schema_cache.json", help="Schema cache file")
+    _add_nl2sql_arguments(nl2sql_parser)
+
+    # Explain parser
+    explain_parser = subparsers.add_parser("explain", help="Explain the query plan of generated SQL")
+    _add_explain_arguments(explain_parser)
+
+    # Catalog parser
+    catalog_parser = subparsers.add_parser("catalog", help="Build the database catalog and rank databases for a query")
+    _add_catalog_arguments(catalog_parser)
+
+    # Examples parser
+    examples_parser = subparsers.add_parser("examples", help="Manage the few-shot examples used for SQL generation")
+    _add_examples_arguments(examples_parser)
+
+    # Load test parser
+    loadtest_parser = subparsers.add_parser("loadtest", help="Load test the NL2SQL flow against a stub LLM")
+    _add_loadtest_arguments(loadtest_parser)
+
+    # Checkpoints parser
+    checkpoints_parser = subparsers.add_parser("checkpoints", help="List and prune checkpoints of unfinished runs")
+    _add_checkpoints_arguments(checkpoints_parser)
+
+    # Evaluate parser
+    evaluate_parser = subparsers.add_parser("evaluate", help="Evaluate predicted SQL on a Spider dataset")
+    _add_evaluate_arguments(evaluate_parser)
     
     # Train parser
     train_parser = subparsers.add_parser("train", help="Train the crew")
     train_parser.add_argument("iterations", type=int, help="Number of iterations")
     train_parser.add_argument("filename", help="Output filename")
+
+    # Replay parser
+    replay_parser = subparsers.add_parser("replay", help="Replay the crew from a specific task")
+    replay_parser.add_argument("task_id", help="Task ID to replay from")
+
+    # Test parser
+    test_parser = subparsers.add_parser("test", help="Test the crew")
+    test_parser.add_argument("iterations", type=int, help="Number of iterations")
+    test_parser.add_argument("eval_llm", help="LLM used to evaluate the results")
     
     # Parse arguments
     args = main_parser.parse_args()
@@ -165,10 +555,26 @@ def main():
         run_original_crew(args.topic)
     elif args.command == "nl2sql":
         run_nl2sql(args)
+    elif args.command == "explain":
+        explain(args)
+    elif args.command == "catalog":
+        catalog(args)
+    elif args.command == "examples":
+        examples(args)
+    elif args.command == "loadtest":
+        loadtest(args)
+    elif args.command == "checkpoints":
+        checkpoints(args)
+    elif args.command == "evaluate":
+        evaluate(args)
     elif args.command == "train":
-        train_crew(args.iterations, args.filename)
+        train(args.iterations, args.filename)
+    elif args.command == "replay":
+        replay(args.task_id)
+    elif args.command == "test":
+        test(args.iterations, args.eval_llm)
     else:
         main_parser.print_help()
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    main()
\ No newline at end of file
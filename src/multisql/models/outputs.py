@@ -0,0 +1,50 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+
+class QueryIntent(BaseModel):
+    """Output of the analyze_intent task; the flags are ComplexityAnalyzer's keys."""
+    main_goal: str
+    aggregation: bool = False
+    grouping: bool = False
+    nesting: bool = False
+    sorting: bool = False
+    distinct: bool = False
+    conditions: List[str] = []
+
+class SchemaElements(BaseModel):
+    """Output of the identify_schema_elements task."""
+    tables: List[str]
+    columns: List[str] = Field(default=[], description="Columns as table.column")
+
+class JoinPath(BaseModel):
+    from_table: str
+    from_column: str
+    to_table: str
+    to_column: str
+
+class RelationshipAnalysis(BaseModel):
+    """Output of the analyze_relationships task."""
+    joins: List[JoinPath]
+
+class ColumnMatch(BaseModel):
+    phrase: str
+    table: str
+    column: str
+    confidence: float = Field(default=1.0, ge=0.0, le=1.0)
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def percent_to_fraction(cls, value):
+        # Models often answer confidences as percentages
+        if isinstance(value, (int, float)) and 1 < value <= 100:
+            return value / 100
+        return value
+
+class SchemaMatches(BaseModel):
+    """Output of the perform_semantic_matching task."""
+    matches: List[ColumnMatch]
+
+class GeneratedSQL(BaseModel):
+    """Output of the compose_sql and optimize_sql tasks."""
+    sql: str
+    explanation: Optional[str] = None
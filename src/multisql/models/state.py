@@ -22,13 +22,33 @@ class DatabaseSchema(BaseModel):
 class NL2SQLState(BaseModel):
     """State model tracking the NL to SQL conversion process."""
     nl_query: str = ""
+    run_id: Optional[str] = None
+    checkpoint_path: Optional[str] = None
+    completed_stages: Dict[str, Any] = {}
     db_schema: Optional[DatabaseSchema] = None
+    db_dir: Optional[str] = None
+    schema_cache_path: Optional[str] = None
+    max_databases: int = 2
+    candidate_databases: List[Dict[str, Any]] = []
+    db_ids: List[str] = []
     parsed_intent: Optional[Dict[str, Any]] = None
     complexity_score: float = 0.0
     tables_involved: List[str] = []
     joins_needed: int = 0
     needs_schema_matching: bool = False
     schema_matching_result: Optional[Dict[str, Any]] = None
+    example_store_path: Optional[str] = "few_shot_examples.jsonl"
+    performance_log_path: Optional[str] = "performance_logs.jsonl"
+    few_shot_k: int = 3
+    few_shot_examples: List[Dict[str, Any]] = []
     generated_sql: str = ""
+    execute: bool = False
+    max_rows: Optional[int] = 1000
+    batch_size: int = 500
+    result_preview: Optional[Dict[str, Any]] = None
+    execution_success: Optional[bool] = None
+    execution_error: Optional[str] = None
     execution_path: List[str] = []
     execution_time: Dict[str, float] = {}
+    model_tiers: Dict[str, str] = {}
+    llm_stats: Dict[str, Dict[str, float]] = {}
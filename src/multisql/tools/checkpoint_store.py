@@ -0,0 +1,82 @@
+from typing import Dict, List, Any, Optional
+import json
+import sqlite3
+import time
+
+
+class CheckpointStore:
+    """
+    SQLite store of flow state checkpoints
+
+    Keeps the latest state of each run, written after every completed stage,
+    so a failed run can resume from its last completed stage.
+    """
+
+    def __init__(self, path: str = "flow_checkpoints.sqlite"):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT PRIMARY KEY, stage TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL lets concurrent runs write checkpoints without blocking readers
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def save(self, run_id: str, stage: str, state: Dict[str, Any]):
+        """Replace the checkpoint of a run with the state after a stage"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (run_id, stage, state, updated_at) VALUES (?, ?, ?, ?)",
+                    (run_id, stage, json.dumps(state), time.time())
+                )
+        finally:
+            conn.close()
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get the last checkpointed state of a run, None if there is none"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT state FROM checkpoints WHERE run_id = ?", (run_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, run_id: str):
+        """Remove the checkpoint of a run"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+        finally:
+            conn.close()
+
+    def list_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """List the most recently checkpointed runs with their last stage"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT run_id, stage, updated_at FROM checkpoints ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"run_id": run_id, "stage": stage, "updated_at": updated_at} for run_id, stage, updated_at in rows]
+
+    def prune(self, max_age: float) -> int:
+        """Remove checkpoints not updated for max_age seconds, returning how many were removed"""
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute("DELETE FROM checkpoints WHERE updated_at < ?", (time.time() - max_age,))
+        finally:
+            conn.close()
+        return cursor.rowcount
@@ -0,0 +1,239 @@
+from typing import Dict, List, Any, Optional
+from collections import defaultdict
+import json
+import math
+import os
+import re
+import threading
+
+from multisql.tools.schema_manager import SchemaManager
+
+INDEX_VERSION = 1
+
+# Weight of a token depending on where it appears in a database
+FIELD_WEIGHTS = {
+    "table": 2.0,
+    "db_id": 1.5,
+    "column": 1.0,
+    "value": 0.5
+}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "by", "with", "from", "at", "as",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "have", "has", "had",
+    "what", "which", "who", "whom", "whose", "when", "where", "how", "many", "much",
+    "list", "show", "give", "find", "return", "tell", "me", "all", "each", "every", "their", "its",
+    "that", "this", "these", "those", "than", "more", "less", "most", "least", "there", "any"
+}
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text and identifiers (snake_case, camelCase) into normalized word tokens"""
+    tokens = []
+    for word in _WORD.findall(str(text)):
+        word = word.lower()
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        # Light stemming so "singers" matches the "singer" table
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class DatabaseCatalog:
+    """
+    Inverted index over all cached database schemas
+
+    Maps tokens from database IDs, table names, column names and sample
+    values to the databases (and tables) containing them, so candidate
+    databases for a question are ranked with a few dictionary lookups.
+    """
+
+    def __init__(self, postings: Dict[str, Dict[str, float]] = None, table_postings: Dict[str, Dict[str, List[str]]] = None,
+                 databases: List[str] = None, source_mtime: float = 0.0):
+        self.postings = postings or {}
+        self.table_postings = table_postings or {}
+        self.databases = databases or []
+        self.source_mtime = source_mtime
+        # Set by from_schema_manager so callers can fetch the schemas of chosen databases
+        self.schema_manager = None
+        self._idf = {}
+        self._compute_idf()
+
+    def _compute_idf(self):
+        count = max(len(self.databases), 1)
+        self._idf = {
+            token: math.log(1 + count / len(dbs))
+            for token, dbs in self.postings.items()
+        }
+
+    @classmethod
+    def build(cls, schemas: Dict[str, Dict[str, Any]], source_mtime: float = 0.0) -> "DatabaseCatalog":
+        """Build the index from schemas as returned by SchemaManager"""
+        postings = defaultdict(dict)
+        table_postings = defaultdict(lambda: defaultdict(list))
+
+        def add(token, db_id, field, table=None):
+            weight = FIELD_WEIGHTS[field]
+            # Keep the strongest field a token appears in for each database
+            if postings[token].get(db_id, 0) < weight:
+                postings[token][db_id] = weight
+            if table and table not in table_postings[token][db_id]:
+                table_postings[token][db_id].append(table)
+
+        for db_id, schema in schemas.items():
+            for token in tokenize(db_id):
+                add(token, db_id, "db_id")
+            for table in schema.get("tables", []):
+                for token in tokenize(table["name"]):
+                    add(token, db_id, "table", table["name"])
+                for column in table.get("columns", []):
+                    for token in tokenize(column["name"]):
+                        add(token, db_id, "column", table["name"])
+                for row in table.get("sample_rows") or []:
+                    for value in row.values():
+                        if isinstance(value, str) and len(value) <= 64:
+                            for token in tokenize(value):
+                                add(token, db_id, "value", table["name"])
+
+        return cls(
+            postings=dict(postings),
+            table_postings={token: dict(dbs) for token, dbs in table_postings.items()},
+            databases=sorted(schemas),
+            source_mtime=source_mtime
+        )
+
+    @classmethod
+    def load(cls, index_path: str) -> Optional["DatabaseCatalog"]:
+        """Load a precomputed index, None if missing or from another version"""
+        try:
+            with open(index_path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(
+            postings=data["postings"],
+            table_postings=data["table_postings"],
+            databases=data["databases"],
+            source_mtime=data.get("source_mtime", 0.0)
+        )
+
+    def save(self, index_path: str):
+        """Save the index for later processes"""
+        with open(index_path, "w") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "databases": self.databases,
+                "source_mtime": self.source_mtime,
+                "postings": self.postings,
+                "table_postings": self.table_postings
+            }, f)
+
+    @classmethod
+    def from_schema_manager(cls, schema_manager: SchemaManager, index_path: Optional[str] = None) -> "DatabaseCatalog":
+        """
+        Load the catalog index, rebuilding it when the schema cache changed
+
+        Every database in the schema manager's directory is extracted into the
+        schema cache first, so the index covers all of them.
+        """
+        cache_path = schema_manager.schema_cache_path
+        if index_path is None and cache_path:
+            index_path = os.path.splitext(cache_path)[0] + ".catalog.json"
+
+        source_mtime = os.path.getmtime(cache_path) if cache_path and os.path.exists(cache_path) else 0.0
+        if index_path:
+            catalog = cls.load(index_path)
+            if catalog and catalog.source_mtime == source_mtime and \
+                    set(catalog.databases) >= set(schema_manager.list_databases()):
+                catalog.schema_manager = schema_manager
+                return catalog
+
+        schemas = schema_manager.cache_all_schemas()
+        if cache_path and os.path.exists(cache_path):
+            source_mtime = os.path.getmtime(cache_path)
+        catalog = cls.build(schemas, source_mtime=source_mtime)
+        if index_path:
+            catalog.save(index_path)
+        catalog.schema_manager = schema_manager
+        return catalog
+
+    def rank(self, question: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank databases by how well their schema covers the question
+
+        Returns:
+            Up to top_k candidates with `db_id`, `score`, matched `tokens` and `tables`
+        """
+        scores = defaultdict(float)
+        matched = defaultdict(set)
+        for token in set(tokenize(question)):
+            dbs = self.postings.get(token)
+            if not dbs:
+                continue
+            idf = self._idf[token]
+            for db_id, weight in dbs.items():
+                scores[db_id] += idf * weight
+                matched[db_id].add(token)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        candidates = []
+        for db_id, score in ranked:
+            tables = []
+            for token in sorted(matched[db_id]):
+                for table in self.table_postings.get(token, {}).get(db_id, []):
+                    if table not in tables:
+                        tables.append(table)
+            candidates.append({
+                "db_id": db_id,
+                "score": score,
+                "tokens": sorted(matched[db_id]),
+                "tables": tables
+            })
+        return candidates
+
+    def select_databases(self, candidates: List[Dict[str, Any]], max_databases: int = 2, span_ratio: float = 0.3) -> List[str]:
+        """
+        Choose the database(s) to answer a question from ranked candidates
+
+        A further database is added only when it covers question tokens the
+        already chosen ones do not, worth at least span_ratio of the top score.
+        """
+        if not candidates:
+            return []
+
+        chosen = [candidates[0]["db_id"]]
+        covered = set(candidates[0]["tokens"])
+        top_score = candidates[0]["score"]
+        for candidate in candidates[1:]:
+            if len(chosen) >= max_databases:
+                break
+            extra = set(candidate["tokens"]) - covered
+            extra_score = sum(
+                self._idf[token] * self.postings[token][candidate["db_id"]] for token in extra
+            )
+            if extra_score >= span_ratio * top_score:
+                chosen.append(candidate["db_id"])
+                covered |= extra
+        return chosen
+
+
+_catalogs: Dict[tuple, DatabaseCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_path: str, schema_cache_path: Optional[str] = None) -> DatabaseCatalog:
+    """Get the catalog for a database directory, loaded once per process"""
+    key = (db_path, schema_cache_path)
+    with _catalogs_lock:
+        if key not in _catalogs:
+            schema_manager = SchemaManager(db_path=db_path, schema_cache_path=schema_cache_path)
+            _catalogs[key] = DatabaseCatalog.from_schema_manager(schema_manager)
+        return _catalogs[key]
@@ -0,0 +1,230 @@
+from typing import Dict, List, Any, Optional
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+# Bytes at the start of a log compared to tell a rotated or rewritten log from the one already read
+_HEAD_BYTES = 256
+
+
+def _features(text: str) -> List[tuple]:
+    """Word, word bigram and character trigram features with their weights"""
+    # Literal values say little about the query shape, so mask them
+    text = _QUOTED.sub(" str ", text.lower())
+    words = ["num" if w[0].isdigit() else w for w in _WORD.findall(text)]
+    features = [(w, 1.0) for w in words]
+    features += [(f"{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+    return features
+
+
+def embed(text: str, dim: int = 1024) -> np.ndarray:
+    """Hash a question into a unit-length feature vector (signed feature hashing)"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class ExampleStore:
+    """
+    Local store of verified (question, schema, SQL) examples
+
+    Examples are kept in a JSONL file and their embeddings in a NumPy matrix;
+    a query is answered by one matrix-vector product, which stays in the
+    millisecond range for tens of thousands of examples.
+    """
+
+    def __init__(self, store_path: str = "few_shot_examples.jsonl", dim: int = 1024):
+        self.store_path = store_path
+        self.dim = dim
+        self.examples: List[Dict[str, Any]] = []
+        self._keys = set()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._harvest_lock = threading.Lock()
+        self._harvested_at: Dict[str, float] = {}
+
+        self._load()
+
+    def _load(self):
+        """Load examples from the store file"""
+        if not os.path.exists(self.store_path):
+            return
+        with open(self.store_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _key(self, example: Dict[str, Any]) -> tuple:
+        return (example.get("db_id"), " ".join(example["question"].lower().split()))
+
+    def _index(self, example: Dict[str, Any]) -> bool:
+        key = self._key(example)
+        if key in self._keys:
+            return False
+
+        # Grow the matrix geometrically so adding examples stays amortized O(1)
+        if self._size == len(self._matrix):
+            grown = np.zeros((max(64, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size] = embed(example["question"], self.dim)
+        self._size += 1
+        self.examples.append(example)
+        self._keys.add(key)
+        return True
+
+    def add(self, question: str, sql: str, db_id: Optional[str] = None, tables: Optional[List[str]] = None) -> bool:
+        """
+        Add a verified example
+
+        Returns:
+            False if the same question was already stored for this database
+        """
+        example = {"question": question, "db_id": db_id, "tables": tables or [], "sql": sql}
+        with self._lock:
+            if not self._index(example):
+                return False
+            store_dir = os.path.dirname(self.store_path)
+            if store_dir and not os.path.exists(store_dir):
+                os.makedirs(store_dir)
+            with open(self.store_path, "a") as f:
+                f.write(json.dumps(example) + "\n")
+        return True
+
+    @staticmethod
+    def _log_head(log_file: str, length: int) -> int:
+        with open(log_file, "rb") as f:
+            return zlib.crc32(f.read(length))
+
+    def harvest(self, log_file: str = "performance_logs.jsonl") -> int:
+        """
+        Add the successful runs logged by PerformanceTracker
+
+        Only entries with `execution_success` true are used. The read position
+        is remembered next to the store, so repeated harvests only read new
+        log lines. A log that was truncated or replaced since (rotation) is
+        read again from the start.
+
+        Returns:
+            Number of examples added
+        """
+        if not os.path.exists(log_file):
+            return 0
+
+        with self._harvest_lock:
+            offset_path = f"{self.store_path}.offset"
+            offset = 0
+            try:
+                with open(offset_path, "r") as f:
+                    saved = json.load(f)
+                if saved.get("log_file") == os.path.abspath(log_file) and saved["offset"] <= os.path.getsize(log_file) \
+                        and saved.get("head") == self._log_head(log_file, min(saved["offset"], _HEAD_BYTES)):
+                    offset = saved["offset"]
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                pass
+
+            added = 0
+            with open(log_file, "r") as f:
+                f.seek(offset)
+                while True:
+                    line = f.readline()
+                    # Stop before a line still being written by another process
+                    if not line.endswith("\n"):
+                        break
+                    offset = f.tell()
+                    log = json.loads(line)
+                    if log.get("execution_success") and log.get("generated_sql"):
+                        if self.add(log["nl_query"], log["generated_sql"], log.get("db_id"), log.get("tables_involved")):
+                            added += 1
+
+            with open(offset_path, "w") as f:
+                json.dump({
+                    "log_file": os.path.abspath(log_file),
+                    "offset": offset,
+                    "head": self._log_head(log_file, min(offset, _HEAD_BYTES))
+                }, f)
+            self._harvested_at[os.path.abspath(log_file)] = time.monotonic()
+        return added
+
+    def refresh(self, log_file: str, min_interval: float = 5.0) -> int:
+        """
+        Harvest runs logged since the last harvest of log_file
+
+        Called before every retrieval, so a long-running process keeps
+        learning from new successful runs; the log is read at most once per
+        min_interval seconds.
+
+        Returns:
+            Number of examples added
+        """
+        last = self._harvested_at.get(os.path.abspath(log_file))
+        if last is not None and time.monotonic() - last < min_interval:
+            return 0
+        return self.harvest(log_file)
+
+    def search(self, question: str, k: int = 3, db_id: Optional[str] = None,
+               min_score: float = 0.2, same_db_bonus: float = 0.05) -> List[Dict[str, Any]]:
+        """
+        Retrieve the k most similar examples
+
+        Parameters:
+            question: Natural language query
+            k: Number of examples
+            db_id: Database of the query; examples from it get a small bonus
+            min_score: Minimum cosine similarity for an example to be returned
+            same_db_bonus: Score bonus for examples from the same database
+
+        Returns:
+            Examples with their `score`, best first
+        """
+        with self._lock:
+            size = self._size
+            if size == 0 or k <= 0:
+                return []
+            scores = self._matrix[:size] @ embed(question, self.dim)
+            if db_id is not None and same_db_bonus:
+                scores = scores + same_db_bonus * np.fromiter(
+                    (e.get("db_id") == db_id for e in self.examples[:size]), dtype=np.float32, count=size
+                )
+            examples = self.examples[:size]
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < size else np.arange(size)
+        top = top[np.argsort(-scores[top])]
+        return [{**examples[i], "score": float(scores[i])} for i in top if scores[i] >= min_score]
+
+
+def format_examples(examples: List[Dict[str, Any]]) -> str:
+    """Render examples as a compact prompt section"""
+    if not examples:
+        return "No similar verified examples are available."
+    blocks = []
+    for example in examples:
+        tables = f" (tables: {', '.join(example['tables'])})" if example.get("tables") else ""
+        blocks.append(f"Question: {example['question']}{tables}\nSQL: {example['sql']}")
+    return "\n\n".join(blocks)
+
+
+_stores: Dict[str, ExampleStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_example_store(store_path: str = "few_shot_examples.jsonl") -> ExampleStore:
+    """Get the example store for a path, loaded once per process"""
+    with _stores_lock:
+        if store_path not in _stores:
+            _stores[store_path] = ExampleStore(store_path)
+        return _stores[store_path]
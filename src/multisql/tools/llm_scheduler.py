@@ -0,0 +1,303 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional
+
+import yaml
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "llm.yaml")
+
+# HTTP status codes worth retrying: rate limited, server errors, provider overloaded
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = ("RateLimit", "Timeout", "ServiceUnavailable", "APIConnectionError", "InternalServerError")
+
+
+class Priority(IntEnum):
+    """Priority classes for LLM calls, lower value is served first"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a call could not acquire a rate limit slot in time"""
+
+
+_current_priority: ContextVar[Priority] = ContextVar("multisql_llm_priority", default=Priority.INTERACTIVE)
+_current_usage: ContextVar[Optional[Dict[str, Dict[str, float]]]] = ContextVar("multisql_llm_usage", default=None)
+
+# Counters kept per model and per stage: calls made, transient errors retried, switches to
+# the fallback model, calls given up, calls that waited for a rate limit slot and the total wait
+STAT_KEYS = ("calls", "retries", "fallbacks", "failures", "throttled", "queue_time")
+
+
+def _new_stats() -> Dict[str, float]:
+    return {key: 0 for key in STAT_KEYS}
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run all LLM calls issued inside the block with the given priority"""
+    token = _current_priority.set(Priority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def llm_usage(usage: Dict[str, Dict[str, float]]):
+    """Also record the per-stage counters of LLM calls issued inside the block into `usage`"""
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether an LLM error is transient (rate limit, overload, timeout)"""
+    status_code = getattr(error, "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._last_refill = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_take(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available
+
+        Returns:
+            0 when the tokens were taken, otherwise seconds until they will be available
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def drain(self):
+        """Empty the bucket, used when the provider signals a rate limit"""
+        self._refill()
+        self.tokens = 0.0
+
+
+class LLMScheduler:
+    """
+    Central scheduler for crew LLM calls
+
+    Applies a token bucket per model, serves waiting calls in priority order
+    (interactive before batch), retries transient errors with jittered
+    exponential backoff and optionally falls back to a cheaper model.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        acquire_timeout: Optional[float] = None,
+        fallback_after: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.fallback_after = fallback_after
+        self._sleep = sleep
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waiters: Dict[str, list] = {}
+        self._seq = itertools.count()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stage_stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_config(cls, config_path: str = DEFAULT_CONFIG_PATH, **kwargs) -> "LLMScheduler":
+        """Create a scheduler from the `scheduler` and `models` sections of a YAML config"""
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f) or {}
+        options = dict(config.get("scheduler") or {})
+        options.update(kwargs)
+        return cls(limits=config.get("models") or {}, **options)
+
+    def model_limit(self, model: str) -> Dict[str, Any]:
+        """Get the configured limits for a model, falling back to `default`"""
+        return self.limits.get(model) or self.limits.get("default") or {"rpm": 60, "burst": 10}
+
+    def _bucket(self, model: str) -> TokenBucket:
+        if model not in self._buckets:
+            limit = self.model_limit(model)
+            rate = limit.get("rpm", 60) / 60.0
+            self._buckets[model] = TokenBucket(rate, limit.get("burst", max(1, rate)), clock=self._clock)
+            self._waiters[model] = []
+            self._stats[model] = _new_stats()
+        return self._buckets[model]
+
+    def _count(self, model: str, key: str, stage: Optional[str] = None, amount: float = 1):
+        usage = _current_usage.get()
+        with self._cond:
+            self._bucket(model)
+            self._stats[model][key] += amount
+            if stage:
+                self._stage_stats.setdefault(stage, _new_stats())[key] += amount
+                if usage is not None:
+                    usage.setdefault(stage, _new_stats())[key] += amount
+
+    def acquire(self, model: str, priority: Optional[Priority] = None, timeout: Optional[float] = None) -> float:
+        """
+        Block until a rate limit slot is available for the model
+
+        Returns:
+            Seconds spent waiting for the slot, 0 if one was free
+        """
+        priority = _current_priority.get() if priority is None else priority
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = self._clock()
+        deadline = None if timeout is None else start + timeout
+
+        with self._cond:
+            bucket = self._bucket(model)
+            waiters = self._waiters[model]
+            ticket = (int(priority), next(self._seq))
+            heapq.heappush(waiters, ticket)
+            waited = False
+            try:
+                while True:
+                    wait = None
+                    # Only the head of the queue may take a token, so higher
+                    # priority calls overtake batch calls that are still waiting
+                    if waiters[0] == ticket:
+                        wait = bucket.try_take()
+                        if wait == 0:
+                            return self._clock() - start if waited else 0.0
+                    if deadline is not None:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0:
+                            raise SchedulerTimeout(f"Timed out waiting for rate limit slot on {model}")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+                    waited = True
+            finally:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Full-jitter exponential backoff, honouring a provider retry hint if present"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            return float(retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call_with_retries(self, model: str, call: Callable[[str], Any], priority: Priority,
+                           timeout: Optional[float] = None, stage: Optional[str] = None):
+        attempt = 0
+        while True:
+            waited = self.acquire(model, priority, timeout=timeout)
+            self._count(model, "calls", stage)
+            if waited > 0:
+                self._count(model, "throttled", stage)
+                self._count(model, "queue_time", stage, waited)
+            try:
+                return call(model)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    self._count(model, "failures", stage)
+                    raise
+                # Slow down every caller of this model, not just the one that was rejected
+                if getattr(e, "status_code", None) == 429 or "RateLimit" in type(e).__name__:
+                    with self._cond:
+                        self._bucket(model).drain()
+                self._count(model, "retries", stage)
+                self._sleep(self.backoff_delay(attempt, e))
+                attempt += 1
+
+    def submit(
+        self,
+        model: str,
+        call: Callable[[str], Any],
+        priority: Optional[Priority] = None,
+        fallback_model: Optional[str] = None,
+        stage: Optional[str] = None,
+    ) -> Any:
+        """
+        Run an LLM call under the scheduler
+
+        Parameters:
+            model: Model the call targets
+            call: Function performing the call, receives the model name to use
+            priority: Priority class, defaults to the one set with `llm_priority`
+            fallback_model: Cheaper model used when the primary is saturated or keeps failing
+            stage: Name of the calling agent, counters are also kept per stage
+
+        Returns:
+            Result of `call`
+        """
+        priority = _current_priority.get() if priority is None else priority
+        if not fallback_model:
+            return self._call_with_retries(model, call, priority, stage=stage)
+
+        try:
+            return self._call_with_retries(model, call, priority, timeout=self.fallback_after, stage=stage)
+        except Exception as e:
+            if not (isinstance(e, SchedulerTimeout) or is_retryable_error(e)):
+                raise
+            self._count(model, "fallbacks", stage)
+            return self._call_with_retries(fallback_model, call, priority, stage=stage)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-model counters (see STAT_KEYS)"""
+        with self._cond:
+            return {model: dict(counts) for model, counts in self._stats.items()}
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage counters (see STAT_KEYS) of the calls that named their stage"""
+        with self._cond:
+            return {stage: dict(counts) for stage, counts in self._stage_stats.items()}
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide scheduler shared by all crews"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            config_path = os.environ.get("MULTISQL_LLM_CONFIG", DEFAULT_CONFIG_PATH)
+            _scheduler = LLMScheduler.from_config(config_path)
+        return _scheduler
+
+
+def set_scheduler(scheduler: Optional[LLMScheduler]):
+    """Replace the process-wide scheduler, e.g. with one configured for a stub endpoint"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
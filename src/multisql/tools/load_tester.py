@@ -0,0 +1,391 @@
+from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+from multisql.tools.spider_evaluator import _percentile
+
+# Phrases marking a question as complex for the stub's intent analysis
+_AGGREGATION_WORDS = ("how many", "number of", "count", "average", "total", "maximum", "minimum", "most")
+_NESTING_WORDS = ("than the average", "not in", "than any", "than all")
+_GROUPING_WORDS = ("each", "per ", "for every")
+
+_QUERY_LINE = re.compile(r"Query: (.+)")
+_SCHEMA_TABLE = re.compile(r"'name': '([^']+)', 'columns'")
+_TABLES_INVOLVED = re.compile(r"Tables involved: \[([^\]]*)\]")
+# Tables of the compact `table(column, ...)` schema listing given to the SQL generator
+_SCHEMA_LISTING = re.compile(r"(?:^|schema: )([\w.]+)\(", re.MULTILINE)
+# SQL answered by an earlier task, passed on as context
+_CONTEXT_SQL = re.compile(r'"sql": ("(?:[^"\\]|\\.)*")')
+
+
+class LatencyDistribution:
+    """Latency distribution of the stub LLM, in seconds"""
+
+    def __init__(self, kind: str = "lognormal", median: float = 0.5, sigma: float = 0.5, seed: Optional[int] = None):
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.median = median
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "constant":
+            return self.median
+        if self.kind == "uniform":
+            # sigma is the relative half-width of the interval around the median
+            return self.median * self._random.uniform(1 - self.sigma, 1 + self.sigma)
+        return self.median * math.exp(self.sigma * self._random.gauss(0, 1))
+
+
+def _stub_answer(prompt: str) -> Dict[str, Any]:
+    """Structured answer to a crew task, recognized from its output format instructions"""
+    query_match = _QUERY_LINE.search(prompt)
+    question = query_match.group(1).lower() if query_match else ""
+
+    if '"main_goal": str' in prompt:
+        return {
+            "main_goal": question,
+            "aggregation": any(word in question for word in _AGGREGATION_WORDS),
+            "grouping": any(word in question for word in _GROUPING_WORDS),
+            "nesting": any(word in question for word in _NESTING_WORDS),
+            "sorting": "most" in question or "order" in question,
+            "distinct": "different" in question or "distinct" in question,
+            "conditions": []
+        }
+    if '"matches": List[' in prompt:
+        return {"matches": []}
+    if '"joins": List[' in prompt:
+        return {"joins": []}
+    if '"tables": List[str]' in prompt:
+        tables = _SCHEMA_TABLE.findall(prompt)
+        mentioned = [t for t in tables if t.split(".")[-1].lower().rstrip("s") in question]
+        return {"tables": mentioned or tables[:1], "columns": []}
+    if '"sql": str' in prompt:
+        # The optimizer keeps the composed query, so the load includes executing real SQL
+        composed = _CONTEXT_SQL.search(prompt)
+        if composed:
+            return {"sql": json.loads(composed.group(1)), "explanation": "stub"}
+        involved = _TABLES_INVOLVED.search(prompt)
+        tables = re.findall(r"'([^']+)'", involved.group(1)) if involved else []
+        tables = tables or _SCHEMA_LISTING.findall(prompt)
+        return {"sql": f"SELECT * FROM {tables[0]} LIMIT 10" if tables else "SELECT 1", "explanation": "stub"}
+    return {}
+
+
+class StubLLMServer:
+    """
+    Local OpenAI-compatible chat completions server for load tests
+
+    Answers every crew task with a valid structured output after a latency
+    drawn from `latency`, and injects HTTP 429 and 500 responses at the
+    given rates, so the scheduler's retry paths are exercised too.
+    """
+
+    def __init__(self, latency: Optional[LatencyDistribution] = None, rate_limit_rate: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency or LatencyDistribution()
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.stats["requests"] += 1
+                    stub._in_flight += 1
+                    stub.stats["max_in_flight"] = max(stub.stats["max_in_flight"], stub._in_flight)
+                    roll = stub._random.random()
+                try:
+                    time.sleep(stub.latency.sample())
+                    if roll < stub.rate_limit_rate:
+                        with stub._lock:
+                            stub.stats["rate_limited"] += 1
+                        return self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}})
+                    if roll < stub.rate_limit_rate + stub.error_rate:
+                        with stub._lock:
+                            stub.stats["errors"] += 1
+                        return self._send(500, {"error": {"message": "Internal error", "type": "server_error"}})
+
+                    prompt = "\n".join(m["content"] for m in body.get("messages", []) if isinstance(m.get("content"), str))
+                    content = f"Thought: I now know the final answer\nFinal Answer: {json.dumps(_stub_answer(prompt))}"
+                    self._send(200, {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                                  "total_tokens": (len(prompt) + len(content)) // 4}
+                    })
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubLLMServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def sample_resources() -> Dict[str, Any]:
+    """Current RSS, thread count and open file descriptors of this process"""
+    rss_mb = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        try:
+            import resource
+            # Peak RSS only (kilobytes on Linux) where /proc is unavailable
+            rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            pass
+    try:
+        fds = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        fds = None
+    return {"rss_mb": rss_mb, "threads": threading.active_count(), "fds": fds}
+
+
+def default_questions(db_ids: List[str], tables: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Build a simple/complex question mix from the tables of the given databases"""
+    questions = []
+    for db_id in db_ids:
+        names = tables.get(db_id, [])
+        if not names:
+            continue
+        questions.append({"question": f"List all {names[0]} records", "db_id": db_id, "kind": "simple"})
+        if len(names) > 1:
+            questions.append({
+                "question": f"For each {names[0]}, how many {names[1]} have a value higher than the average {names[1]}?",
+                "db_id": db_id,
+                "kind": "complex"
+            })
+    return questions
+
+
+class LoadGenerator:
+    """
+    Drive a flow runner at a target rate and record latency, errors and resources
+
+    Arrivals are open-loop (Poisson at `qps`), so latency is measured from
+    the scheduled arrival time and includes queueing when the workers are
+    saturated. Resources are sampled every `sample_interval` seconds.
+    """
+
+    def __init__(self, run_query: Callable[[Dict[str, Any]], Dict[str, Any]], questions: List[Dict[str, Any]],
+                 qps: float = 1.0, duration: float = 60.0, concurrency: int = 8, complex_ratio: Optional[float] = None,
+                 sample_interval: float = 1.0, seed: Optional[int] = None):
+        if not questions:
+            raise ValueError("The load test needs at least one question")
+        self.run_query = run_query
+        self.questions = questions
+        self.qps = qps
+        self.duration = duration
+        self.concurrency = concurrency
+        self.complex_ratio = complex_ratio
+        self.sample_interval = sample_interval
+        self._random = random.Random(seed)
+        self._results = []
+        self._results_lock = threading.Lock()
+
+    def _pick_question(self) -> Dict[str, Any]:
+        if self.complex_ratio is not None:
+            kind = "complex" if self._random.random() < self.complex_ratio else "simple"
+            pool = [q for q in self.questions if q.get("kind", "simple") == kind]
+            if pool:
+                return self._random.choice(pool)
+        return self._random.choice(self.questions)
+
+    def _execute(self, question: Dict[str, Any], scheduled: float):
+        started = time.monotonic()
+        outcome = {"kind": question.get("kind", "simple"), "queued": started - scheduled, "error": None, "route": None}
+        try:
+            result = self.run_query(question)
+            outcome["route"] = next((step for step in result.get("execution_path", []) if step.startswith("routed_to_")), None)
+        except Exception as e:
+            outcome["error"] = type(e).__name__
+        finished = time.monotonic()
+        outcome["latency"] = finished - scheduled
+        outcome["service_time"] = finished - started
+        outcome["finished"] = finished
+        with self._results_lock:
+            self._results.append(outcome)
+
+    def run(self) -> Dict[str, Any]:
+        """Run the load test and return its report"""
+        samples = []
+        stop_sampling = threading.Event()
+        start = time.monotonic()
+
+        def sampler():
+            while True:
+                samples.append({"t": time.monotonic() - start, **sample_resources()})
+                if stop_sampling.wait(self.sample_interval):
+                    break
+
+        sampler_thread = threading.Thread(target=sampler, name="load-sampler", daemon=True)
+        sampler_thread.start()
+
+        submitted = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load") as executor:
+            next_arrival = start
+            while next_arrival - start < self.duration:
+                delay = next_arrival - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._execute, self._pick_question(), next_arrival)
+                submitted += 1
+                next_arrival += self._random.expovariate(self.qps)
+        wall_time = time.monotonic() - start
+
+        stop_sampling.set()
+        sampler_thread.join()
+        samples.append({"t": time.monotonic() - start, **sample_resources()})
+
+        return self._report(submitted, wall_time, samples)
+
+    def _report(self, submitted: int, wall_time: float, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        results = list(self._results)
+        completed = [r for r in results if r["error"] is None]
+        errors = {}
+        for r in results:
+            if r["error"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+        def latency_stats(outcomes):
+            latencies = [r["latency"] for r in outcomes]
+            return {
+                "count": len(latencies),
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p99": _percentile(latencies, 99),
+                "max": max(latencies) if latencies else None,
+                "queued_p99": _percentile([r["queued"] for r in outcomes], 99)
+            }
+
+        routes = {}
+        for r in completed:
+            routes[r["route"]] = routes.get(r["route"], 0) + 1
+
+        rss = [s["rss_mb"] for s in samples if s["rss_mb"] is not None]
+        return {
+            "target_qps": self.qps,
+            "concurrency": self.concurrency,
+            "submitted": submitted,
+            "completed": len(completed),
+            "failed": len(results) - len(completed),
+            "error_rate": (len(results) - len(completed)) / len(results) if results else 0.0,
+            "errors": errors,
+            "wall_time": wall_time,
+            "throughput": len(completed) / wall_time if wall_time > 0 else 0.0,
+            "latency": {
+                "all": latency_stats(completed),
+                **{kind: latency_stats([r for r in completed if r["kind"] == kind])
+                   for kind in sorted({r["kind"] for r in completed})}
+            },
+            "routes": routes,
+            "resources": {
+                "rss_start_mb": rss[0] if rss else None,
+                "rss_end_mb": rss[-1] if rss else None,
+                "rss_peak_mb": max(rss) if rss else None,
+                "threads_start": samples[0]["threads"],
+                "threads_end": samples[-1]["threads"],
+                "fds_start": samples[0]["fds"],
+                "fds_end": samples[-1]["fds"],
+                "samples": samples
+            }
+        }
+
+
+def format_load_report(report: Dict[str, Any]) -> str:
+    """Render a load test report as text"""
+    def ms(value):
+        return f"{value * 1000:8.0f}" if value is not None else "       -"
+
+    lines = [
+        f"Submitted {report['submitted']} queries at {report['target_qps']} QPS target, "
+        f"concurrency {report['concurrency']}, in {report['wall_time']:.1f} s",
+        f"Throughput: {report['throughput']:.2f} queries/s, error rate {report['error_rate']:.1%}",
+        "",
+        f"{'latency (ms)':<14}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'queue p99':>10}"
+    ]
+    for name, stats in report["latency"].items():
+        lines.append(f"{name:<14}{stats['count']:>7}{ms(stats['p50'])} {ms(stats['p90'])} {ms(stats['p99'])} "
+                     f"{ms(stats['max'])} {ms(stats['queued_p99'])}")
+
+    if report["routes"]:
+        lines.append("")
+        lines.append("Routes: " + ", ".join(f"{route}={count}" for route, count in report["routes"].items()))
+    if report["errors"]:
+        lines.append("Errors: " + ", ".join(f"{error}={count}" for error, count in report["errors"].items()))
+
+    res = report["resources"]
+    lines.append("")
+    if res["rss_start_mb"] is not None:
+        lines.append(f"RSS: {res['rss_start_mb']:.0f} MB -> {res['rss_end_mb']:.0f} MB (peak {res['rss_peak_mb']:.0f} MB)")
+    lines.append(f"Threads: {res['threads_start']} -> {res['threads_end']}")
+    if res["fds_start"] is not None:
+        lines.append(f"Open file descriptors: {res['fds_start']} -> {res['fds_end']}")
+    if "llm" in report:
+        llm = report["llm"]
+        lines.append(f"Stub LLM: {llm['requests']} requests, {llm['rate_limited']} rate limited, "
+                     f"{llm['errors']} errors, max {llm['max_in_flight']} in flight")
+    if report.get("scheduler"):
+        # Time calls spent queued for a rate limit slot in the scheduler, per agent
+        lines.append("")
+        lines.append(f"{'scheduler':<22}{'calls':>7}{'throttled':>10}{'queue ms':>10}{'retries':>8}{'fallbacks':>10}{'failures':>9}")
+        for stage, stats in sorted(report["scheduler"].items()):
+            queue_ms = stats["queue_time"] * 1000 / stats["calls"] if stats["calls"] else 0.0
+            lines.append(f"{stage:<22}{stats['calls']:>7}{stats['throttled']:>10}{queue_ms:>10.0f}"
+                         f"{stats['retries']:>8}{stats['fallbacks']:>10}{stats['failures']:>9}")
+    return "\n".join(lines)
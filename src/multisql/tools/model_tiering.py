@@ -0,0 +1,98 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from multisql.tools.llm_scheduler import DEFAULT_CONFIG_PATH
+
+AUTO_TIER = "auto"
+
+
+class ModelTiering:
+    """Choose the model used by each flow stage from the query complexity"""
+
+    def __init__(
+        self,
+        tiers: Dict[str, Dict[str, Any]],
+        stages: Optional[Dict[str, str]] = None,
+        large_for_nesting: bool = True,
+        large_min_joins: Optional[int] = 2,
+    ):
+        if not tiers:
+            raise ValueError("At least one model tier must be configured")
+        # Tiers ordered from cheapest to largest; the last one has no upper bound
+        self.tiers = sorted(
+            tiers.items(),
+            key=lambda item: item[1].get("max_complexity", float("inf")),
+        )
+        self.stages = stages or {}
+        self.large_for_nesting = large_for_nesting
+        self.large_min_joins = large_min_joins
+
+    @classmethod
+    def from_config(cls, config_path: str = DEFAULT_CONFIG_PATH) -> "ModelTiering":
+        """Create the tiering from the `tiers` and `stages` sections of a YAML config"""
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f) or {}
+        return cls(tiers=config.get("tiers") or {}, stages=config.get("stages") or {}, **(config.get("tiering") or {}))
+
+    @property
+    def largest_tier(self) -> str:
+        return self.tiers[-1][0]
+
+    def model_for(self, tier: str) -> str:
+        """Get the model name configured for a tier"""
+        return dict(self.tiers)[tier]["model"]
+
+    def select_tier(self, complexity_score: float, intent: Optional[Dict[str, Any]] = None, joins_needed: int = 0) -> str:
+        """
+        Pick the cheapest tier able to handle a query
+
+        Parameters:
+            complexity_score: Score from ComplexityAnalyzer (0-10)
+            intent: Parsed query intent
+            joins_needed: Number of JOIN operations needed
+
+        Returns:
+            Tier name
+        """
+        intent = intent or {}
+        # Nested and multi-join queries always go to the largest model
+        if self.large_for_nesting and intent.get("nesting"):
+            return self.largest_tier
+        if self.large_min_joins is not None and joins_needed >= self.large_min_joins:
+            return self.largest_tier
+
+        for name, tier in self.tiers:
+            if complexity_score <= tier.get("max_complexity", float("inf")):
+                return name
+        return self.largest_tier
+
+    def select(self, stage: str, complexity_score: float = 0.0, intent: Optional[Dict[str, Any]] = None, joins_needed: int = 0) -> Tuple[str, str]:
+        """
+        Pick the tier and model for a flow stage
+
+        Stages configured with a tier name are pinned to it, stages set to
+        `auto` (or not configured) are tiered by complexity.
+
+        Returns:
+            (tier name, model name)
+        """
+        tier = self.stages.get(stage, AUTO_TIER)
+        if tier == AUTO_TIER:
+            tier = self.select_tier(complexity_score, intent, joins_needed)
+        return tier, self.model_for(tier)
+
+
+_tiering: Optional[ModelTiering] = None
+_tiering_lock = threading.Lock()
+
+
+def get_model_tiering() -> ModelTiering:
+    """Get the process-wide model tiering loaded from the LLM config"""
+    global _tiering
+    with _tiering_lock:
+        if _tiering is None:
+            _tiering = ModelTiering.from_config(os.environ.get("MULTISQL_LLM_CONFIG", DEFAULT_CONFIG_PATH))
+        return _tiering
@@ -0,0 +1,144 @@
+from typing import Any, Optional, Type
+import ast
+import json
+import re
+
+from pydantic import BaseModel, ValidationError
+from crewai.utilities.converter import Converter, ConverterError
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_JSON_LITERALS = {"true": "True", "false": "False", "null": "None"}
+
+
+def _balanced_span(text: str) -> Optional[str]:
+    """Return the first balanced {...} or [...] span of text"""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    stack = []
+    in_string = None
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == in_string:
+                in_string = None
+        elif char in "\"'":
+            in_string = char
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                return None
+            if not stack:
+                return text[start:i + 1]
+    # Truncated output: close what is still open
+    return text[start:] + "".join(reversed(stack)) if stack and not in_string else None
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse the JSON in an LLM answer, repairing the usual defects locally
+
+    Handles code fences, prose around the object, trailing commas, single
+    quotes and Python literals (True/None), and unclosed brackets.
+
+    Raises:
+        ValueError: If no JSON value can be recovered
+    """
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    span = _balanced_span(text)
+    if span is None:
+        raise ValueError("No JSON object found in output")
+
+    try:
+        return json.loads(span, strict=False)
+    except json.JSONDecodeError:
+        pass
+    span = _TRAILING_COMMA.sub(r"\1", span)
+    try:
+        return json.loads(span, strict=False)
+    except json.JSONDecodeError:
+        pass
+    # Python dict syntax (single quotes, True/None), possibly mixed with JSON literals
+    try:
+        return ast.literal_eval(re.sub(r"\b(true|false|null)\b", lambda m: _JSON_LITERALS[m.group(1)], span))
+    except (ValueError, SyntaxError):
+        raise ValueError("Output is not valid JSON")
+
+
+def parse_output(text: str, model: Type[BaseModel]) -> BaseModel:
+    """
+    Parse an LLM answer into a pydantic output model in one pass
+
+    A bare list is accepted for models with a single list field (e.g. a list
+    of matches for SchemaMatches).
+
+    Raises:
+        ValueError: If the answer cannot be parsed or does not validate
+    """
+    data = repair_json(text)
+    if isinstance(data, list):
+        list_fields = [name for name, field in model.model_fields.items()
+                       if getattr(field.annotation, "__origin__", None) is list]
+        if len(list_fields) != 1:
+            raise ValueError(f"Expected an object for {model.__name__}, got a list")
+        data = {list_fields[0]: data}
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise ValueError(f"Output does not match {model.__name__}: {e}")
+
+
+class RepairingConverter(Converter):
+    """
+    Task output converter that repairs the answer locally before asking an LLM
+
+    crewAI falls back to the converter when the raw answer is not strict JSON;
+    the default converter re-sends the answer to the LLM up to three times.
+    This one only does so, once, when local repair fails; if that fails too
+    the raw answer is kept and `task_output` reports the parse error.
+    """
+
+    max_attempts: int = 1
+
+    def to_pydantic(self, current_attempt=1) -> BaseModel:
+        try:
+            return parse_output(self.text, self.model)
+        except ValueError:
+            pass
+        try:
+            return super().to_pydantic(current_attempt)
+        except ConverterError as e:
+            return e
+
+    def to_json(self, current_attempt=1):
+        try:
+            return parse_output(self.text, self.model).model_dump()
+        except ValueError:
+            return super().to_json(current_attempt)
+
+
+def task_output(crew_output, task_index: int, model: Type[BaseModel]) -> BaseModel:
+    """
+    Get a task's structured output from a crew result
+
+    Falls back to parsing the raw answer when crewAI could not convert it.
+
+    Raises:
+        ValueError: If the task produced no usable output
+    """
+    output = crew_output.tasks_output[task_index]
+    if isinstance(output.pydantic, model):
+        return output.pydantic
+    if output.json_dict:
+        return model.model_validate(output.json_dict)
+    return parse_output(output.raw, model)
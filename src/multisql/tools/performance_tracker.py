@@ -1,7 +1,30 @@
 import json
 import os
+import threading
 from datetime import datetime
 
+# execution_time keys holding the latency of each tiered stage
+STAGE_TIMINGS = {
+    "understand_query": ["understand_query"],
+    "schema_matching": ["schema_matching"],
+    "sql_generation": ["standard_processing", "sql_generation_enhanced"]
+}
+
+# execution_time keys measured inside another stage, already counted in its timing
+NESTED_TIMINGS = ("schema_matching", "sql_generation_enhanced", "example_retrieval")
+
+def total_latency(execution_time):
+    """End-to-end latency of a run: the sum of its top-level stage timings"""
+    return sum(value for key, value in execution_time.items() if key not in NESTED_TIMINGS)
+
+# One lock per log file, shared by all trackers in the process
+_log_locks = {}
+_log_locks_lock = threading.Lock()
+
+def _log_lock(log_file):
+    with _log_locks_lock:
+        return _log_locks.setdefault(os.path.abspath(log_file), threading.Lock())
+
 class PerformanceTracker:
     """Track and record query processing performance"""
     
@@ -13,12 +36,15 @@ class PerformanceTracker:
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "nl_query": state.nl_query,
+            "db_id": state.db_schema.db_id if state.db_schema else None,
             "complexity_score": state.complexity_score,
             "tables_involved": state.tables_involved,
             "joins_needed": state.joins_needed,
             "schema_matching_used": state.needs_schema_matching,
             "execution_path": state.execution_path,
             "execution_time": execution_time or state.execution_time,
+            "model_tiers": state.model_tiers,
+            "llm_stats": state.llm_stats,
             "generated_sql": state.generated_sql
         }
         
@@ -27,23 +53,58 @@ class PerformanceTracker:
             
         # Ensure log directory exists
         log_dir = os.path.dirname(self.log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
             
-        # Append to log file
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        # Append to log file; concurrent flows must not interleave partial lines
+        line = json.dumps(log_entry) + "\n"
+        with _log_lock(self.log_file):
+            with open(self.log_file, "a") as f:
+                f.write(line)
     
+    def _read_logs(self):
+        """Read all log entries"""
+        logs = []
+        with open(self.log_file, "r") as f:
+            for line in f:
+                logs.append(json.loads(line))
+        return logs
+
+    def analyze_tier_performance(self):
+        """Analyze latency and accuracy per model tier and stage"""
+        if not os.path.exists(self.log_file):
+            return None
+
+        tiers = {}
+        for log in self._read_logs():
+            for stage, tier in log.get("model_tiers", {}).items():
+                stats = tiers.setdefault(tier, {}).setdefault(stage, {
+                    "count": 0, "total_latency": 0.0, "evaluated": 0, "success": 0
+                })
+                stats["count"] += 1
+                stats["total_latency"] += sum(
+                    log["execution_time"].get(key, 0.0) for key in STAGE_TIMINGS.get(stage, [stage])
+                )
+                if "execution_success" in log:
+                    stats["evaluated"] += 1
+                    if log["execution_success"]:
+                        stats["success"] += 1
+
+        # Derive averages and success rates
+        for stages in tiers.values():
+            for stats in stages.values():
+                stats["avg_latency"] = stats["total_latency"] / stats["count"]
+                stats["success_rate"] = stats["success"] / stats["evaluated"] if stats["evaluated"] > 0 else None
+
+        return tiers
+
     def analyze_performance_trends(self):
         """Analyze performance trends, optimize decision model"""
         if not os.path.exists(self.log_file):
             return None
             
         # Read logs
-        logs = []
-        with open(self.log_file, "r") as f:
-            for line in f:
-                logs.append(json.loads(line))
+        logs = self._read_logs()
                 
         # Analyze schema matching effect
         schema_matching_impact = {}
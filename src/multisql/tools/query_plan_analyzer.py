@@ -0,0 +1,209 @@
+from typing import Dict, List, Any, Optional
+import re
+import sqlite3
+
+# EXPLAIN QUERY PLAN details; "TABLE" was dropped from the wording in SQLite 3.36
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (?:COVERING )?INDEX (\w+))?")
+_AUTOMATIC_INDEX = re.compile(
+    r"^SEARCH (?:TABLE )?(\w+)(?: AS (\w+))? USING AUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX \(([^)]*)\)"
+)
+_TEMP_BTREE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+_COMPARISON = r"(?:=|<>|!=|<=|>=|<|>|\bLIKE\b|\bIN\b|\bBETWEEN\b|\bIS\b)"
+_PREDICATE_LEFT = re.compile(rf"(?:(\w+)\.)?(\w+)\s*{_COMPARISON}", re.IGNORECASE)
+_PREDICATE_RIGHT = re.compile(rf"{_COMPARISON}\s*(?:(\w+)\.)?(\w+)", re.IGNORECASE)
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+
+
+class QueryPlanAnalyzer:
+    """Inspect the SQLite query plan of generated SQL for full scans and missing indexes"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+
+    def _db_file(self, db_id: str) -> str:
+        return f"{self.db_path}/{db_id}/{db_id}.sqlite"
+
+    def explain(self, db_id: str, sql: str) -> Dict[str, Any]:
+        """
+        Run EXPLAIN QUERY PLAN for a query and report its slow spots
+
+        Parameters:
+            db_id: Database ID in the Spider layout
+            sql: Query to analyze
+
+        Returns:
+            Report with the plan, full table scans, missing indexes and temporary B-trees
+        """
+        conn = sqlite3.connect(f"file:{self._db_file(db_id)}?mode=ro", uri=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")
+            plan = [{"id": row[0], "parent": row[1], "detail": row[3]} for row in cursor.fetchall()]
+
+            tables = self._table_columns(cursor)
+            indexed = self._indexed_columns(cursor, tables)
+            aliases = self._table_aliases(sql, tables)
+            predicates = self._predicate_columns(sql, tables, aliases)
+
+            full_scans = []
+            missing_indexes = []
+            temp_btrees = []
+            for step in plan:
+                detail = step["detail"]
+
+                scan = _SCAN.match(detail)
+                # Newer SQLite versions name the scanned table by its alias only
+                table = scan and aliases.get((scan.group(2) or scan.group(1)).lower())
+                if table and not scan.group(3):
+                    full_scans.append({
+                        "table": table,
+                        "estimated_rows": self._estimate_rows(cursor, table)
+                    })
+                    # A scan is avoidable when the query filters or joins on unindexed columns
+                    columns = [c for c in predicates.get(table, []) if c not in indexed[table]]
+                    if columns:
+                        missing_indexes.append(self._index_suggestion(
+                            table, columns[:1], "full table scan filtered on unindexed column"
+                        ))
+                    continue
+
+                automatic = _AUTOMATIC_INDEX.match(detail)
+                table = automatic and aliases.get((automatic.group(2) or automatic.group(1)).lower())
+                if table:
+                    columns = [c.split("=")[0].split(">")[0].split("<")[0].strip()
+                               for c in automatic.group(3).split(" AND ")]
+                    missing_indexes.append(self._index_suggestion(
+                        table, columns, "SQLite builds a temporary automatic index on every run"
+                    ))
+                    continue
+
+                btree = _TEMP_BTREE.search(detail)
+                if btree:
+                    temp_btrees.append(btree.group(1))
+        finally:
+            conn.close()
+
+        # The same index can be suggested by several plan steps
+        unique_indexes = []
+        for index in missing_indexes:
+            if index not in unique_indexes:
+                unique_indexes.append(index)
+
+        return {
+            "db_id": db_id,
+            "sql": sql,
+            "plan": plan,
+            "full_scans": full_scans,
+            "missing_indexes": unique_indexes,
+            "temp_btrees": temp_btrees
+        }
+
+    def _table_columns(self, cursor) -> Dict[str, List[str]]:
+        """Get the columns of every table in the database"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+        tables = {}
+        for (table_name,) in cursor.fetchall():
+            cursor.execute(f"PRAGMA table_info('{table_name}')")
+            tables[table_name] = [col[1] for col in cursor.fetchall()]
+        return tables
+
+    def _indexed_columns(self, cursor, tables: Dict[str, List[str]]) -> Dict[str, set]:
+        """Get the columns that lead an index (usable for lookups) per table"""
+        indexed = {}
+        for table_name in tables:
+            leading = set()
+            cursor.execute(f"PRAGMA index_list('{table_name}')")
+            for index in cursor.fetchall():
+                cursor.execute(f"PRAGMA index_info('{index[1]}')")
+                columns = sorted(cursor.fetchall())
+                if columns and columns[0][2] is not None:
+                    leading.add(columns[0][2])
+            # INTEGER PRIMARY KEY is the rowid and needs no index
+            cursor.execute(f"PRAGMA table_info('{table_name}')")
+            for col in cursor.fetchall():
+                if col[5] == 1 and col[2].upper() == "INTEGER":
+                    leading.add(col[1])
+            indexed[table_name] = leading
+        return indexed
+
+    def _table_aliases(self, sql: str, tables: Dict[str, List[str]]) -> Dict[str, str]:
+        """Map lowercased table names and aliases used in the query to table names"""
+        aliases = {name.lower(): name for name in tables}
+        for table, alias in _TABLE_ALIAS.findall(sql):
+            for name in tables:
+                if name.lower() == table.lower():
+                    aliases[table.lower()] = name
+                    if alias and alias.upper() not in ("WHERE", "JOIN", "ON", "GROUP", "ORDER", "LIMIT", "INNER",
+                                                       "LEFT", "NATURAL", "CROSS", "UNION", "INTERSECT", "EXCEPT"):
+                        aliases[alias.lower()] = name
+        return aliases
+
+    def _predicate_columns(self, sql: str, tables: Dict[str, List[str]], aliases: Dict[str, str]) -> Dict[str, List[str]]:
+        """Find table columns used in comparisons (WHERE, ON, HAVING) of the query"""
+        used_tables = {name for table, _ in _TABLE_ALIAS.findall(sql)
+                       for name in tables if name.lower() == table.lower()}
+
+        columns = {}
+        for pattern in (_PREDICATE_LEFT, _PREDICATE_RIGHT):
+            for qualifier, column in pattern.findall(sql):
+                if qualifier:
+                    candidates = [aliases[qualifier.lower()]] if qualifier.lower() in aliases else []
+                else:
+                    candidates = [t for t in used_tables if column.lower() in (c.lower() for c in tables[t])]
+                for table in candidates:
+                    for name in tables[table]:
+                        if name.lower() == column.lower() and name not in columns.setdefault(table, []):
+                            columns[table].append(name)
+        return columns
+
+    def _estimate_rows(self, cursor, table: str) -> Optional[int]:
+        """Cheap row count estimate: sqlite_stat1 if analyzed, else the largest rowid"""
+        try:
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,))
+            row = cursor.fetchone()
+            if row:
+                return int(row[0].split()[0])
+        except sqlite3.Error:
+            pass
+        try:
+            cursor.execute(f"SELECT max(rowid) FROM '{table}'")
+            return cursor.fetchone()[0] or 0
+        except sqlite3.Error:
+            return None
+
+    def _index_suggestion(self, table: str, columns: List[str], reason: str) -> Dict[str, Any]:
+        name = f"idx_{table}_{'_'.join(columns)}".lower()
+        return {
+            "table": table,
+            "columns": columns,
+            "reason": reason,
+            "suggestion": f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+        }
+
+
+def format_plan_report(report: Dict[str, Any]) -> str:
+    """Render a query plan report as text"""
+    lines = ["Query plan:"]
+    depth = {0: 0}
+    for step in report["plan"]:
+        depth[step["id"]] = depth.get(step["parent"], 0) + 1
+        lines.append(f"{'  ' * depth[step['id']]}{step['detail']}")
+
+    lines.append("")
+    if report["full_scans"]:
+        lines.append("Full table scans:")
+        for scan in report["full_scans"]:
+            rows = scan["estimated_rows"]
+            lines.append(f"  {scan['table']} (~{rows} rows)" if rows is not None else f"  {scan['table']}")
+    else:
+        lines.append("No full table scans.")
+
+    if report["missing_indexes"]:
+        lines.append("Missing indexes:")
+        for index in report["missing_indexes"]:
+            lines.append(f"  {index['suggestion']};  -- {index['reason']}")
+
+    if report["temp_btrees"]:
+        lines.append(f"Temporary B-trees for: {', '.join(report['temp_btrees'])}")
+
+    return "\n".join(lines)
@@ -0,0 +1,250 @@
+from typing import Dict, List, Any, Optional
+import asyncio
+import sqlite3
+import threading
+import time
+
+# Arrow type names for the Python types SQLite returns
+_ARROW_TYPES = {
+    int: "int64",
+    float: "double",
+    str: "string",
+    bytes: "binary",
+    type(None): "null"
+}
+
+
+def _value_size(value: Any) -> int:
+    """Approximate in-memory payload size of a SQLite value"""
+    if isinstance(value, (str, bytes)):
+        return len(value) + 8
+    return 8
+
+
+def _column_type(values: List[Any]) -> str:
+    """Arrow type of a column from the Python types of its values"""
+    types = {_ARROW_TYPES.get(type(value), "string") for value in values} - {"null"}
+    if not types:
+        return "null"
+    if types == {"int64", "double"}:
+        return "double"
+    # SQLite columns are dynamically typed; mixed columns are rendered as strings
+    return types.pop() if len(types) == 1 else "string"
+
+
+class ColumnBatch:
+    """A chunk of query results in columnar (Arrow-style) layout"""
+
+    def __init__(self, columns: List[str], arrays: List[List[Any]], offset: int = 0):
+        self.columns = columns
+        self.arrays = arrays
+        self.offset = offset
+        self.types = [_column_type(array) for array in arrays]
+
+    @classmethod
+    def from_rows(cls, columns: List[str], rows: List[tuple], offset: int = 0) -> "ColumnBatch":
+        arrays = [list(array) for array in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns, arrays, offset)
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def rows(self) -> List[tuple]:
+        """Row-oriented view of the batch"""
+        return list(zip(*self.arrays))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "types": self.types,
+            "offset": self.offset,
+            "num_rows": self.num_rows,
+            "data": {column: array for column, array in zip(self.columns, self.arrays)}
+        }
+
+    def to_arrow(self):
+        """Convert to a pyarrow RecordBatch (requires the optional pyarrow package)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("ColumnBatch.to_arrow requires pyarrow: pip install pyarrow")
+        arrays = []
+        for array, arrow_type in zip(self.arrays, self.types):
+            if arrow_type == "string":
+                array = [None if value is None else str(value) for value in array]
+            arrays.append(pa.array(array, type=getattr(pa, arrow_type)()))
+        return pa.RecordBatch.from_arrays(arrays, names=self.columns)
+
+
+class QueryStream:
+    """
+    Stream the results of a query from SQLite in bounded columnar batches
+
+    Rows are fetched incrementally with `fetchmany`, so the first batch is
+    available as soon as SQLite produces it and memory is bounded by one
+    batch. Batches shrink for wide rows to stay under max_batch_bytes. The
+    stream stops early, recording why in `truncated`, when max_rows or
+    max_bytes is reached, when a fetch exceeds timeout or when cancelled.
+
+    Iterate it directly or with `async for`; the async iterator fetches in
+    a worker thread, so the connection must allow use from other threads.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, sql: str, batch_size: int = 500, max_rows: Optional[int] = None,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024, max_batch_bytes: int = 4 * 1024 * 1024,
+                 timeout: Optional[float] = None, close_connection: bool = True):
+        self.conn = conn
+        self.sql = sql
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_batch_bytes = max_batch_bytes
+        self.timeout = timeout
+        self.close_connection = close_connection
+
+        self.columns: List[str] = []
+        self.rows_streamed = 0
+        self.bytes_streamed = 0
+        self.batches = 0
+        self.truncated: Optional[str] = None
+        self.first_batch_latency: Optional[float] = None
+
+        self._cursor = None
+        self._done = False
+        self._pending = None
+        self._rows_per_batch = batch_size
+        self._cancelled = threading.Event()
+        self._deadline = None
+        self._started = None
+
+    def _interrupt(self) -> int:
+        """SQLite progress handler: non-zero aborts the running statement"""
+        if self._cancelled.is_set():
+            return 1
+        return 1 if self._deadline is not None and time.monotonic() > self._deadline else 0
+
+    def _fetch(self, size: int) -> List[tuple]:
+        self._deadline = time.monotonic() + self.timeout if self.timeout else None
+        try:
+            if self._cursor is None:
+                self._started = time.perf_counter()
+                self.conn.set_progress_handler(self._interrupt, 1000)
+                self._cursor = self.conn.execute(self.sql)
+                self.columns = [column[0] for column in self._cursor.description or []]
+            return self._cursor.fetchmany(size)
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            self.truncated = "cancelled" if self._cancelled.is_set() else "timeout"
+            return []
+
+    def _has_more(self) -> bool:
+        """Check whether rows remain, keeping the peeked row for the next batch"""
+        if self._pending is None:
+            self._pending = self._fetch(1)
+        return bool(self._pending)
+
+    def next_batch(self) -> Optional[ColumnBatch]:
+        """Fetch the next batch, None when the stream is exhausted or stopped"""
+        if self._done:
+            return None
+        if self._cancelled.is_set():
+            self.truncated = self.truncated or "cancelled"
+            self.close()
+            return None
+
+        size = self._rows_per_batch
+        if self.max_rows is not None:
+            size = min(size, self.max_rows - self.rows_streamed)
+
+        rows = self._pending or []
+        self._pending = None
+        if size > len(rows):
+            rows += self._fetch(size - len(rows))
+
+        if rows:
+            batch = ColumnBatch.from_rows(self.columns, rows, offset=self.rows_streamed)
+            batch_bytes = sum(_value_size(value) for row in rows for value in row)
+            if self.first_batch_latency is None:
+                self.first_batch_latency = time.perf_counter() - self._started
+            self.rows_streamed += len(rows)
+            self.bytes_streamed += batch_bytes
+            self.batches += 1
+            # Size later batches from the observed row width
+            row_bytes = max(1, batch_bytes // len(rows))
+            self._rows_per_batch = max(1, min(self.batch_size, self.max_batch_bytes // row_bytes))
+        else:
+            batch = None
+
+        # Stop at the caps only when rows remain, so `truncated` means data was left out
+        if batch is not None and not self.truncated:
+            if self.max_rows is not None and self.rows_streamed >= self.max_rows and self._has_more():
+                self.truncated = "max_rows"
+            elif self.max_bytes is not None and self.bytes_streamed >= self.max_bytes and self._has_more():
+                self.truncated = "max_bytes"
+        if batch is None or self.truncated:
+            self.close()
+        return batch
+
+    def cancel(self):
+        """Stop the stream; safe to call from another thread while a batch is being fetched"""
+        self._cancelled.set()
+        try:
+            self.conn.interrupt()
+        except sqlite3.ProgrammingError:
+            pass
+
+    def close(self):
+        """Release the cursor (and the connection if the stream owns it)"""
+        if self._done:
+            return
+        self._done = True
+        self._pending = None
+        try:
+            if self._cursor is not None:
+                self._cursor.close()
+            self.conn.set_progress_handler(None, 0)
+            if self.close_connection:
+                self.conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "rows": self.rows_streamed,
+            "batches": self.batches,
+            "bytes": self.bytes_streamed,
+            "truncated": self.truncated,
+            "first_batch_latency": self.first_batch_latency
+        }
+
+    def __iter__(self):
+        try:
+            while True:
+                batch = self.next_batch()
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ColumnBatch:
+        try:
+            batch = await asyncio.to_thread(self.next_batch)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+        if batch is None:
+            raise StopAsyncIteration
+        return batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
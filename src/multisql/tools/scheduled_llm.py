@@ -0,0 +1,79 @@
+import os
+from typing import Any, Dict, Optional
+
+from crewai import LLM
+
+from multisql.tools.llm_scheduler import LLMScheduler, get_scheduler
+
+
+class ScheduledLLM(LLM):
+    """LLM whose calls all go through the shared LLMScheduler"""
+
+    def __init__(
+        self,
+        model: str,
+        stage: Optional[str] = None,
+        fallback_model: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        **kwargs,
+    ):
+        super().__init__(model=model, **kwargs)
+        self.stage = stage
+        self.fallback_model = fallback_model
+        self.scheduler = scheduler or get_scheduler()
+        self._fallback_llm = None
+
+    def call(self, *args, **kwargs) -> Any:
+        return self.scheduler.submit(
+            self.model,
+            lambda model: self._call_model(model, *args, **kwargs),
+            fallback_model=self.fallback_model,
+            stage=self.stage,
+        )
+
+    def _call_model(self, model: str, *args, **kwargs) -> Any:
+        if model == self.model:
+            return super().call(*args, **kwargs)
+
+        if self._fallback_llm is None:
+            self._fallback_llm = LLM(
+                model=model,
+                base_url=_base_url(self.scheduler, model) or self.base_url,
+                api_key=self.api_key,
+                temperature=self.temperature,
+                max_retries=0,
+            )
+        return self._fallback_llm.call(*args, **kwargs)
+
+
+def _base_url(scheduler: LLMScheduler, model: str) -> Optional[str]:
+    return os.environ.get("MULTISQL_LLM_BASE_URL") or scheduler.model_limit(model).get("base_url")
+
+
+def scheduled_llm(agent_config: Dict[str, Any], stage: str, model: Optional[str] = None) -> ScheduledLLM:
+    """
+    Build the scheduled LLM for an agent from its YAML config
+
+    Parameters:
+        agent_config: Agent entry from agents.yaml (`llm` and optional `fallback_llm`)
+        stage: Name of the agent, used for reporting
+        model: Model chosen by the flow's tiering, overrides the configured `llm`
+
+    Returns:
+        ScheduledLLM instance
+    """
+    if model is None:
+        llm = agent_config.get("llm")
+        # CrewBase may already have replaced the model name with an LLM instance
+        model = getattr(llm, "model", llm)
+    fallback_model = agent_config.get("fallback_llm")
+    scheduler = get_scheduler()
+    return ScheduledLLM(
+        model=model,
+        stage=stage,
+        fallback_model=fallback_model if fallback_model != model else None,
+        scheduler=scheduler,
+        base_url=_base_url(scheduler, model),
+        # Retries are owned by the scheduler, not the provider client
+        max_retries=0,
+    )
@@ -1,6 +1,12 @@
 from typing import Dict, List, Any, Optional
+import os
+import re
 import sqlite3
 import json
+import threading
+
+# SQLite's default SQLITE_MAX_ATTACHED
+MAX_ATTACHED_DATABASES = 10
 
 class SchemaManager:
     """Database schema management tool"""
@@ -9,6 +15,7 @@ class SchemaManager:
         self.db_path = db_path
         self.schema_cache_path = schema_cache_path
         self.schema_cache = {}
+        self._cache_lock = threading.Lock()
         
         if schema_cache_path:
             self._load_schema_cache()
@@ -24,8 +31,14 @@ class SchemaManager:
     def _save_schema_cache(self):
         """Save schema information to cache file"""
         if self.schema_cache_path:
-            with open(self.schema_cache_path, 'w') as f:
-                json.dump(self.schema_cache, f)
+            # Write a temporary file and swap it in, so readers never see a partial cache
+            # (the dict is copied first as other threads may add schemas meanwhile)
+            data = json.dumps(dict(self.schema_cache))
+            tmp_path = f"{self.schema_cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with self._cache_lock:
+                with open(tmp_path, 'w') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.schema_cache_path)
     
     def get_database_schema(self, db_id: str) -> Dict[str, Any]:
         """Get database schema information"""
@@ -42,15 +55,98 @@ class SchemaManager:
         
         return schema
     
+    def _db_file(self, db_id: str) -> str:
+        return f"{self.db_path}/{db_id}/{db_id}.sqlite"
+
+    def list_databases(self) -> List[str]:
+        """List the IDs of all databases in the Spider-layout database directory"""
+        if not self.db_path or not os.path.isdir(self.db_path):
+            return []
+        return sorted(
+            db_id for db_id in os.listdir(self.db_path)
+            if os.path.isfile(self._db_file(db_id))
+        )
+
+    def cache_all_schemas(self) -> Dict[str, Dict[str, Any]]:
+        """Extract and cache the schema of every database not cached yet"""
+        missing = [db_id for db_id in self.list_databases() if db_id not in self.schema_cache]
+        for db_id in missing:
+            self.schema_cache[db_id] = self._extract_schema_from_db(db_id)
+        if missing:
+            self._save_schema_cache()
+        return self.schema_cache
+
+    def get_federated_schema(self, db_ids: List[str]) -> Dict[str, Any]:
+        """
+        Merge the schemas of several databases into one
+
+        Table names are qualified with their database ID (`db_id.table`), which
+        is the name each database is attached under by `connect`.
+        """
+        if len(db_ids) == 1:
+            return self.get_database_schema(db_ids[0])
+
+        schema = {
+            "db_id": "+".join(db_ids),
+            "tables": [],
+            "relationships": []
+        }
+        for db_id in db_ids:
+            db_schema = self.get_database_schema(db_id)
+            for table in db_schema["tables"]:
+                name = f"{db_id}.{table['name']}"
+                schema["tables"].append({
+                    **table,
+                    "name": name,
+                    "columns": [{**col, "table": name} for col in table["columns"]],
+                    "foreign_keys": [{**fk, "ref_table": f"{db_id}.{fk['ref_table']}"} for fk in table["foreign_keys"]]
+                })
+            for relationship in db_schema["relationships"]:
+                schema["relationships"].append({
+                    **relationship,
+                    "from_table": f"{db_id}.{relationship['from_table']}",
+                    "to_table": f"{db_id}.{relationship['to_table']}"
+                })
+        return schema
+
+    def connect(self, db_ids: List[str], read_only: bool = True, check_same_thread: bool = True) -> sqlite3.Connection:
+        """
+        Open a connection to one or several databases
+
+        A single database is opened directly. Several databases are attached
+        to an in-memory connection under their database IDs, so queries can
+        join across them with `db_id.table` names.
+        """
+        mode = "?mode=ro" if read_only else ""
+        if len(db_ids) == 1:
+            return sqlite3.connect(f"file:{self._db_file(db_ids[0])}{mode}", uri=True, check_same_thread=check_same_thread)
+
+        if len(db_ids) > MAX_ATTACHED_DATABASES:
+            raise ValueError(f"Cannot attach more than {MAX_ATTACHED_DATABASES} databases")
+
+        conn = sqlite3.connect("file::memory:", uri=True, check_same_thread=check_same_thread)
+        try:
+            for db_id in db_ids:
+                if not re.fullmatch(r"\w+", db_id):
+                    raise ValueError(f"Invalid database ID: {db_id}")
+                if not os.path.isfile(self._db_file(db_id)):
+                    raise FileNotFoundError(self._db_file(db_id))
+                conn.execute(f'ATTACH DATABASE ? AS "{db_id}"', (f"file:{self._db_file(db_id)}{mode}",))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
     def _extract_schema_from_db(self, db_id: str) -> Dict[str, Any]:
         """Extract schema information from database"""
-        db_path = f"{self.db_path}/{db_id}/{db_id}.sqlite"
+        db_path = self._db_file(db_id)
         schema = {
             "db_id": db_id,
             "tables": [],
             "relationships": []
         }
         
+        conn = None
         try:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
@@ -107,10 +203,11 @@ class SchemaManager:
                     }
                     schema["relationships"].append(relationship)
             
-            conn.close()
-            
         except Exception as e:
             print(f"Error extracting schema for {db_id}: {str(e)}")
+        finally:
+            if conn is not None:
+                conn.close()
             
         return schema
     
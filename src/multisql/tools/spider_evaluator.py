@@ -0,0 +1,476 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from multisql.tools.performance_tracker import total_latency
+
+HARDNESS_LEVELS = ["easy", "medium", "hard", "extra"]
+
+CLAUSE_KEYWORDS = ["select", "from", "where", "group by", "having", "order by", "limit", "intersect", "union", "except"]
+AGG_FUNCTIONS = ("count(", "sum(", "avg(", "min(", "max(")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_CLAUSE_PATTERN = re.compile(r"\b(" + "|".join(k.replace(" ", r"\s+") for k in CLAUSE_KEYWORDS) + r")\b")
+_FROM_SPLIT = re.compile(r"\s*(?:,|\b(?:natural\s+|left\s+|right\s+|inner\s+|cross\s+|outer\s+)*join\b)\s*")
+_CONDITION_SPLIT = re.compile(r"\s+(?:and|or)\s+")
+_COMPARISON_OPERATOR = re.compile(r"\s*(<>|!=|<=|>=|=|<|>)\s*")
+
+
+def normalize_sql(sql: str, mask_values: bool = True) -> str:
+    """Lowercase SQL, collapse whitespace and optionally replace literals by `value`"""
+    sql = sql.strip().rstrip(";")
+    if mask_values:
+        sql = _STRING_LITERAL.sub("value", sql)
+        sql = _NUMBER_LITERAL.sub("value", sql)
+    sql = re.sub(r"\s+", " ", sql.lower())
+    sql = re.sub(r"\s*([(),])\s*", r"\1", sql).replace(",", ", ")
+    # `x=1` and `x = 1` are the same condition
+    sql = _COMPARISON_OPERATOR.sub(r" \1 ", sql)
+    return sql.strip()
+
+
+def _split_top_level(text: str, pattern: re.Pattern) -> List[str]:
+    """Split on a pattern, ignoring matches nested inside parentheses"""
+    parts, start = [], 0
+    for match in pattern.finditer(_depth_mask(text)):
+        parts.append(text[start:match.start()])
+        start = match.end()
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _depth_mask(text: str) -> str:
+    """Replace characters inside parentheses by spaces so regexes only see the top level"""
+    out, depth = [], 0
+    for c in text:
+        if c == "(":
+            depth += 1
+            out.append(c)
+        elif c == ")":
+            depth -= 1
+            out.append(c)
+        else:
+            out.append(c if depth == 0 else " ")
+    return "".join(out)
+
+
+def split_clauses(sql: str) -> Dict[str, str]:
+    """Split a normalized SQL statement into its top-level clauses"""
+    masked = _depth_mask(sql)
+    matches = list(_CLAUSE_PATTERN.finditer(masked))
+    clauses = {}
+    for i, match in enumerate(matches):
+        keyword = re.sub(r"\s+", " ", match.group(1))
+        if keyword in ("intersect", "union", "except"):
+            # Set operations: keep the right-hand query as a single component
+            clauses[keyword] = sql[match.end():].strip()
+            break
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(sql)
+        clauses[keyword] = sql[match.end():end].strip()
+    return clauses
+
+
+def _resolve_aliases(clauses: Dict[str, str]) -> Dict[str, str]:
+    """Replace table aliases (T1, T2, ...) by table names"""
+    aliases = {}
+    for unit in _split_top_level(clauses.get("from", ""), _FROM_SPLIT):
+        unit = unit.split(" on ")[0].strip()
+        tokens = unit.split()
+        if len(tokens) == 3 and tokens[1] == "as":
+            aliases[tokens[2]] = tokens[0]
+        elif len(tokens) == 2:
+            aliases[tokens[1]] = tokens[0]
+
+    resolved = {}
+    for keyword, text in clauses.items():
+        for alias, table in aliases.items():
+            text = re.sub(rf"\b{re.escape(alias)}\.", f"{table}.", text)
+            text = re.sub(rf"\b{re.escape(table)}\s+(?:as\s+)?{re.escape(alias)}\b", table, text)
+        resolved[keyword] = text
+    return resolved
+
+
+def sql_components(sql: str) -> Dict[str, frozenset]:
+    """
+    Decompose SQL into comparable component sets
+
+    Each clause becomes an unordered set of items: select/group by/order by
+    items, from tables and join conditions, where/having conditions. Values
+    are masked, so two queries differing only in literals compare equal.
+    """
+    clauses = _resolve_aliases(split_clauses(normalize_sql(sql)))
+    components = {}
+    for keyword, text in clauses.items():
+        if keyword in ("select", "group by"):
+            items = _split_top_level(text, re.compile(r","))
+        elif keyword == "order by":
+            # Ascending is the default direction
+            items = [re.sub(r"\s+asc$", "", item) for item in _split_top_level(text, re.compile(r","))]
+        elif keyword == "from":
+            items = []
+            for unit in _split_top_level(text, _FROM_SPLIT):
+                table, _, condition = unit.partition(" on ")
+                items.append(table.strip())
+                items.extend(f"on {c}" for c in _split_top_level(condition, _CONDITION_SPLIT))
+        elif keyword in ("where", "having"):
+            items = _split_top_level(text, _CONDITION_SPLIT)
+            # Keep the connective structure so `a and b` differs from `a or b`
+            items.append("or" if re.search(r"\bor\b", _depth_mask(text)) else "and")
+        elif keyword in ("intersect", "union", "except"):
+            items = [frozenset(sql_components(text).items())]
+        else:
+            items = [text]
+        components[keyword] = frozenset(items)
+    return components
+
+
+def exact_set_match(gold_sql: str, predicted_sql: str) -> bool:
+    """Component-wise set comparison of two queries, an approximation of Spider's exact-set-match"""
+    try:
+        return sql_components(gold_sql) == sql_components(predicted_sql)
+    except Exception:
+        return False
+
+
+def classify_hardness(sql: str) -> str:
+    """Classify a gold query into Spider's easy/medium/hard/extra buckets"""
+    normalized = normalize_sql(sql)
+    clauses = split_clauses(normalized)
+    top_level = _depth_mask(normalized)
+
+    # Component 1: where, group by, order by, limit, joins, or, like
+    component1 = sum(1 for k in ("where", "group by", "order by", "limit") if k in clauses)
+    component1 += len(_split_top_level(clauses.get("from", ""), _FROM_SPLIT)) - 1 if "from" in clauses else 0
+    component1 += len(re.findall(r"\bor\b", top_level)) + len(re.findall(r"\blike\b", top_level))
+
+    # Component 2: nested queries and set operations
+    component2 = len(re.findall(r"\bselect\b", normalized)) - 1
+
+    # Others: multiple aggregations, select columns, where conditions, group by columns
+    others = 0
+    if sum(normalized.count(agg) for agg in AGG_FUNCTIONS) > 1:
+        others += 1
+    if len(_split_top_level(clauses.get("select", ""), re.compile(r","))) > 1:
+        others += 1
+    if len(_split_top_level(clauses.get("where", ""), _CONDITION_SPLIT)) > 1:
+        others += 1
+    if len(_split_top_level(clauses.get("group by", ""), re.compile(r","))) > 1:
+        others += 1
+
+    if component1 <= 1 and others == 0 and component2 == 0:
+        return "easy"
+    if (others <= 2 and component1 <= 1 and component2 == 0) or \
+            (component1 <= 2 and others < 2 and component2 == 0):
+        return "medium"
+    if (others > 2 and component1 <= 2 and component2 == 0) or \
+            (2 < component1 <= 3 and others <= 2 and component2 == 0) or \
+            (component1 <= 1 and others == 0 and component2 <= 1):
+        return "hard"
+    return "extra"
+
+
+def _canonical_value(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def execute_query(conn: sqlite3.Connection, sql: str, timeout: float) -> Dict[str, Any]:
+    """Execute a query with a time limit and return its rows in JSON-serializable form"""
+    deadline = time.monotonic() + timeout
+    conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 10000)
+    try:
+        rows = conn.execute(sql).fetchall()
+        return {"rows": [[_canonical_value(v) for v in row] for row in rows], "error": None}
+    except Exception as e:
+        return {"rows": None, "error": str(e)}
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def results_match(gold: Dict[str, Any], predicted: Dict[str, Any], ordered: bool) -> bool:
+    """Compare execution results, respecting row order only when the gold query orders them"""
+    if gold["error"] is not None or predicted["error"] is not None:
+        return False
+    gold_rows = [tuple(row) for row in gold["rows"]]
+    predicted_rows = [tuple(row) for row in predicted["rows"]]
+    if len(gold_rows) != len(predicted_rows):
+        return False
+    if not gold_rows:
+        return True
+
+    # Accept the same columns selected in a different order
+    order = _column_permutation(gold_rows, predicted_rows)
+    if order is None:
+        return False
+    predicted_rows = [tuple(row[i] for i in order) for row in predicted_rows]
+    if ordered:
+        return gold_rows == predicted_rows
+    return Counter(gold_rows) == Counter(predicted_rows)
+
+
+def _column_permutation(gold_rows: List[tuple], predicted_rows: List[tuple]) -> Optional[List[int]]:
+    """Map each gold column to a predicted column holding the same multiset of values"""
+    width = len(gold_rows[0])
+    if any(len(row) != width for row in predicted_rows):
+        return None
+    gold_columns = [Counter(row[i] for row in gold_rows) for i in range(width)]
+    predicted_columns = [Counter(row[i] for row in predicted_rows) for i in range(width)]
+
+    order, used = [], set()
+    for gold_column in gold_columns:
+        match = next((j for j in range(width) if j not in used and predicted_columns[j] == gold_column), None)
+        if match is None:
+            return None
+        order.append(match)
+        used.add(match)
+    return order
+
+
+def _evaluate_chunk(db_file: str, items: List[Dict[str, Any]], timeout: float) -> List[Dict[str, Any]]:
+    """Worker: execute gold (unless cached) and predicted SQL for examples of one database"""
+    outcomes = []
+    try:
+        conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        error = {"rows": None, "error": f"Cannot open database: {e}"}
+        return [{"index": item["index"], "gold_result": item["gold_result"] or error, "predicted_result": error}
+                for item in items]
+
+    try:
+        for item in items:
+            gold_result = item["gold_result"] or execute_query(conn, item["gold"], timeout)
+            predicted_result = execute_query(conn, item["predicted"], timeout) if item["predicted"] else \
+                {"rows": None, "error": "No prediction"}
+            outcomes.append({
+                "index": item["index"],
+                "gold_result": gold_result,
+                "predicted_result": predicted_result
+            })
+    finally:
+        conn.close()
+    return outcomes
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class SpiderEvaluator:
+    """Offline evaluation of predicted SQL against Spider-layout SQLite databases"""
+
+    def __init__(
+        self,
+        db_path: str,
+        gold_cache_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        timeout: float = 30.0,
+        chunk_size: int = 50,
+    ):
+        self.db_path = db_path
+        self.gold_cache_path = gold_cache_path
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.gold_cache = {}
+
+        if gold_cache_path:
+            self._load_gold_cache()
+
+    def _load_gold_cache(self):
+        """Load cached gold results from cache file"""
+        try:
+            with open(self.gold_cache_path, 'r') as f:
+                self.gold_cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.gold_cache = {}
+
+    def _save_gold_cache(self):
+        """Save gold results to cache file"""
+        if self.gold_cache_path:
+            with open(self.gold_cache_path, 'w') as f:
+                json.dump(self.gold_cache, f)
+
+    def _db_file(self, db_id: str) -> str:
+        return f"{self.db_path}/{db_id}/{db_id}.sqlite"
+
+    def _gold_key(self, db_id: str, gold_sql: str) -> str:
+        # Include the database mtime so a modified database invalidates its entries
+        try:
+            mtime = os.path.getmtime(self._db_file(db_id))
+        except OSError:
+            mtime = 0
+        return hashlib.sha1(f"{db_id}\0{mtime}\0{gold_sql}".encode()).hexdigest()
+
+    def evaluate(self, examples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Evaluate predictions
+
+        Parameters:
+            examples: Dicts with `db_id`, `question`, `gold` and `predicted` SQL,
+                and optionally `route`, `latency` and `hardness`
+
+        Returns:
+            Report with overall, per-hardness and per-route metrics and per-example results
+        """
+        start_time = time.time()
+
+        # Group work by database so each worker reuses one connection per chunk
+        by_db = defaultdict(list)
+        keys = []
+        for index, example in enumerate(examples):
+            key = self._gold_key(example["db_id"], example["gold"])
+            keys.append(key)
+            by_db[example["db_id"]].append({
+                "index": index,
+                "gold": example["gold"],
+                "predicted": example.get("predicted") or "",
+                "gold_result": self.gold_cache.get(key)
+            })
+
+        chunks = []
+        for db_id, items in by_db.items():
+            for i in range(0, len(items), self.chunk_size):
+                chunks.append((self._db_file(db_id), items[i:i + self.chunk_size]))
+
+        outcomes = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(_evaluate_chunk, db_file, items, self.timeout) for db_file, items in chunks]
+            for future in futures:
+                for outcome in future.result():
+                    outcomes[outcome["index"]] = outcome
+
+        results = []
+        for index, example in enumerate(examples):
+            outcome = outcomes[index]
+            gold_result = outcome["gold_result"]
+            if gold_result["error"] is None:
+                self.gold_cache[keys[index]] = gold_result
+
+            ordered = "order by" in split_clauses(normalize_sql(example["gold"]))
+            results.append({
+                "db_id": example["db_id"],
+                "question": example.get("question"),
+                "hardness": example.get("hardness") or classify_hardness(example["gold"]),
+                "route": example.get("route"),
+                "latency": example.get("latency"),
+                "execution_match": results_match(gold_result, outcome["predicted_result"], ordered),
+                "exact_match": bool(example.get("predicted")) and exact_set_match(example["gold"], example["predicted"]),
+                "gold_error": gold_result["error"],
+                "predicted_error": outcome["predicted_result"]["error"]
+            })
+
+        self._save_gold_cache()
+
+        report = self._build_report(results)
+        report["elapsed"] = time.time() - start_time
+        report["examples"] = results
+        return report
+
+    def _summarize(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        count = len(results)
+        latencies = [r["latency"] for r in results if r["latency"] is not None]
+        return {
+            "count": count,
+            "execution_accuracy": sum(r["execution_match"] for r in results) / count if count else 0,
+            "exact_match": sum(r["exact_match"] for r in results) / count if count else 0,
+            "latency": {
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95)
+            }
+        }
+
+    def _build_report(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        by_hardness = defaultdict(list)
+        by_route = defaultdict(list)
+        for result in results:
+            by_hardness[result["hardness"]].append(result)
+            by_route[result["route"] or "unknown"].append(result)
+
+        return {
+            **self._summarize(results),
+            "by_hardness": {level: self._summarize(by_hardness[level]) for level in HARDNESS_LEVELS if by_hardness[level]},
+            "by_route": {route: self._summarize(items) for route, items in sorted(by_route.items())},
+            "errors": {
+                "gold": sum(1 for r in results if r["gold_error"]),
+                "predicted": sum(1 for r in results if r["predicted_error"])
+            }
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render an evaluation report as a text table"""
+    def row(name, summary):
+        latency = summary["latency"]["mean"]
+        latency_text = f"{latency:8.2f}s" if latency is not None else f"{'-':>9}"
+        return f"{name:<20}{summary['count']:>7}{summary['execution_accuracy']:>10.3f}{summary['exact_match']:>10.3f}{latency_text}"
+
+    lines = [f"{'':<20}{'count':>7}{'exec':>10}{'exact':>10}{'latency':>9}"]
+    lines.append(row("all", report))
+    lines.append("")
+    for level, summary in report["by_hardness"].items():
+        lines.append(row(level, summary))
+    lines.append("")
+    for route, summary in report["by_route"].items():
+        lines.append(row(route, summary))
+    lines.append("")
+    lines.append(f"gold errors: {report['errors']['gold']}, predicted errors: {report['errors']['predicted']}, "
+                 f"elapsed: {report['elapsed']:.1f}s")
+    return "\n".join(lines)
+
+
+def load_spider_examples(dataset_path: str) -> List[Dict[str, Any]]:
+    """Load questions and gold SQL from a Spider dataset file (dev.json) or gold file (dev_gold.sql)"""
+    if dataset_path.endswith(".json"):
+        with open(dataset_path, "r") as f:
+            return [{"db_id": item["db_id"], "question": item["question"], "gold": item["query"]}
+                    for item in json.load(f)]
+
+    examples = []
+    with open(dataset_path, "r") as f:
+        for line in f:
+            if line.strip():
+                gold, db_id = line.rstrip("\n").rsplit("\t", 1)
+                examples.append({"db_id": db_id.strip(), "question": None, "gold": gold.strip()})
+    return examples
+
+
+def attach_predictions(examples: List[Dict[str, Any]], predictions_path: str) -> List[Dict[str, Any]]:
+    """
+    Attach predicted SQL to examples
+
+    Accepts either a Spider prediction file (one SQL per line, in dataset
+    order) or a PerformanceTracker log (matched by database and question,
+    carrying the route and latency of each run).
+    """
+    if predictions_path.endswith(".jsonl"):
+        runs = {}
+        with open(predictions_path, "r") as f:
+            for line in f:
+                log = json.loads(line)
+                route = "route_to_enhanced" if "enhanced_processing" in log["execution_path"] else "route_to_standard"
+                # Spider repeats questions across databases
+                runs[(log.get("db_id"), log["nl_query"])] = {
+                    "predicted": log["generated_sql"],
+                    "route": route,
+                    "latency": total_latency(log["execution_time"])
+                }
+        return [{**example, **runs.get((example["db_id"], example["question"]), {"predicted": ""})} for example in examples]
+
+    with open(predictions_path, "r") as f:
+        predictions = [line.strip() for line in f]
+    return [{**example, "predicted": predictions[i] if i < len(predictions) else ""}
+            for i, example in enumerate(examples)]
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+
+import pytest
+
+# Flow and crew tests run offline
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+SPIDER_DATABASES = {
+    "concert_singer": [
+        "CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country TEXT, age INTEGER)",
+        "CREATE TABLE concert (concert_id INTEGER PRIMARY KEY, concert_name TEXT, year INTEGER, "
+        "singer_id INTEGER REFERENCES singer(singer_id))",
+        "INSERT INTO singer VALUES (1, 'Joe Sharp', 'Netherlands', 52), (2, 'Timbaland', 'United States', 32), "
+        "(3, 'Justin Brown', 'France', 29)",
+        "INSERT INTO concert VALUES (1, 'Auditions', 2014, 1), (2, 'Super bootcamp', 2014, 2), (3, 'Home Visits', 2015, 3)",
+    ],
+    "music_library": [
+        "CREATE TABLE artist (artist_id INTEGER PRIMARY KEY, artist_name TEXT, country TEXT)",
+        "CREATE TABLE album (album_id INTEGER PRIMARY KEY, title TEXT, artist_id INTEGER REFERENCES artist(artist_id))",
+        "CREATE TABLE track (track_id INTEGER PRIMARY KEY, title TEXT, album_id INTEGER REFERENCES album(album_id), "
+        "milliseconds INTEGER)",
+        "INSERT INTO artist VALUES (1, 'Joe Sharp', 'Netherlands'), (2, 'Daft Punk', 'France')",
+        "INSERT INTO album VALUES (1, 'Discovery', 2), (2, 'Homework', 2), (3, 'Sharp Edges', 1)",
+        "INSERT INTO track VALUES (1, 'One More Time', 1, 320000), (2, 'Da Funk', 2, 330000), (3, 'Edge', 3, 200000)",
+    ],
+    "flight_company": [
+        "CREATE TABLE airport (airport_id INTEGER PRIMARY KEY, city TEXT, country TEXT)",
+        "CREATE TABLE flight (flight_id INTEGER PRIMARY KEY, origin INTEGER, destination INTEGER, price REAL)",
+        "INSERT INTO airport VALUES (1, 'Amsterdam', 'Netherlands'), (2, 'Paris', 'France')",
+        "INSERT INTO flight VALUES (1, 1, 2, 120.5), (2, 2, 1, 99.0)",
+    ],
+}
+
+
+def create_database(path, statements):
+    """Create a SQLite file from SQL statements"""
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in statements:
+            conn.execute(statement)
+    conn.close()
+
+
+@pytest.fixture
+def spider_dir(tmp_path):
+    """A Spider-layout database directory: <db_id>/<db_id>.sqlite"""
+    root = tmp_path / "database"
+    for db_id, statements in SPIDER_DATABASES.items():
+        (root / db_id).mkdir(parents=True)
+        create_database(str(root / db_id / f"{db_id}.sqlite"), statements)
+    return str(root)
@@ -0,0 +1,29 @@
+import time
+
+from multisql.tools.checkpoint_store import CheckpointStore
+
+
+def test_save_load_and_delete(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    store.save("run1", "understand_query", {"nl_query": "How many singers?"})
+    store.save("run1", "evaluate_complexity", {"nl_query": "How many singers?", "complexity_score": 2.5})
+
+    assert store.load("run1") == {"nl_query": "How many singers?", "complexity_score": 2.5}
+    assert [run["stage"] for run in store.list_runs()] == ["evaluate_complexity"]
+
+    store.delete("run1")
+    assert store.load("run1") is None
+    assert store.list_runs() == []
+
+
+def test_prune_removes_only_stale_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    store.save("old", "understand_query", {})
+    conn = store._connect()
+    with conn:
+        conn.execute("UPDATE checkpoints SET updated_at = ? WHERE run_id = 'old'", (time.time() - 3 * 86400,))
+    conn.close()
+    store.save("recent", "understand_query", {})
+
+    assert store.prune(86400) == 1
+    assert [run["run_id"] for run in store.list_runs()] == ["recent"]
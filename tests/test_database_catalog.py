@@ -0,0 +1,106 @@
+import json
+import math
+import os
+import sqlite3
+
+import pytest
+
+from multisql.tools.database_catalog import DatabaseCatalog, tokenize
+from multisql.tools.schema_manager import SchemaManager
+
+
+@pytest.fixture
+def schema_manager(spider_dir, tmp_path):
+    return SchemaManager(db_path=spider_dir, schema_cache_path=str(tmp_path / "schema_cache.json"))
+
+
+def test_tokenize_splits_identifiers_and_stems():
+    assert tokenize("How many Singers are there?") == ["singer"]
+    assert tokenize("concertName, singer_id") == ["concert", "name", "singer", "id"]
+    assert tokenize("countries in class") == ["country", "class"]
+    assert tokenize("HTMLParser bus") == ["html", "parser", "bus"]
+
+
+def test_rank_weights_rare_tokens_by_idf():
+    catalog = DatabaseCatalog.build({
+        "concert_singer": {"tables": [{"name": "singer", "columns": [{"name": "country"}]}]},
+        "music_library": {"tables": [{"name": "artist", "columns": [{"name": "country"}]}]},
+    })
+
+    [top, other] = catalog.rank("Which singers come from a country in Europe?")
+
+    assert top["db_id"] == "concert_singer"
+    assert top["tokens"] == ["country", "singer"] and top["tables"] == ["singer"]
+    # singer is a table name (weight 2) in one of two databases; country a column in both
+    assert top["score"] == pytest.approx(2.0 * math.log(3) + 1.0 * math.log(2))
+    assert other == {"db_id": "music_library", "score": pytest.approx(math.log(2)), "tokens": ["country"], "tables": ["artist"]}
+
+
+def test_select_databases_spans_databases_only_for_uncovered_tokens(schema_manager):
+    catalog = DatabaseCatalog.from_schema_manager(schema_manager)
+
+    spanning = catalog.rank("Which singers also have an album?")
+    assert catalog.select_databases(spanning, max_databases=2) == ["concert_singer", "music_library"]
+    assert catalog.select_databases(spanning, max_databases=1) == ["concert_singer"]
+
+    single = catalog.rank("How many singers are from the Netherlands?")
+    assert single[0]["db_id"] == "concert_singer"
+    assert catalog.select_databases(single, max_databases=2) == ["concert_singer"]
+
+
+def test_index_is_rebuilt_when_the_schema_cache_changes(schema_manager, tmp_path):
+    cache_path = schema_manager.schema_cache_path
+    index_path = str(tmp_path / "schema_cache.catalog.json")
+    DatabaseCatalog.from_schema_manager(schema_manager)
+    assert os.path.exists(index_path)
+
+    # Rename a table in the cached schema without touching the databases
+    with open(cache_path) as f:
+        cache = json.load(f)
+    cache["flight_company"]["tables"][0]["name"] = "heliport"
+    with open(cache_path, "w") as f:
+        json.dump(cache, f)
+    mtime = os.path.getmtime(cache_path)
+
+    os.utime(cache_path, (mtime, DatabaseCatalog.load(index_path).source_mtime))
+    reused = DatabaseCatalog.from_schema_manager(SchemaManager(db_path=schema_manager.db_path, schema_cache_path=cache_path))
+    assert reused.rank("heliports") == []
+
+    os.utime(cache_path, (mtime, mtime + 10))
+    rebuilt = DatabaseCatalog.from_schema_manager(SchemaManager(db_path=schema_manager.db_path, schema_cache_path=cache_path))
+    assert rebuilt.rank("heliports")[0]["db_id"] == "flight_company"
+    assert DatabaseCatalog.load(index_path).source_mtime == mtime + 10
+
+
+def test_federated_schema_qualifies_tables(schema_manager):
+    schema = schema_manager.get_federated_schema(["concert_singer", "music_library"])
+
+    assert schema["db_id"] == "concert_singer+music_library"
+    assert "music_library.album" in [table["name"] for table in schema["tables"]]
+    assert {"from_table": "concert_singer.concert", "from_column": "singer_id",
+            "to_table": "concert_singer.singer", "to_column": "singer_id"} in schema["relationships"]
+    album = next(table for table in schema["tables"] if table["name"] == "music_library.album")
+    assert album["foreign_keys"] == [{"column": "artist_id", "ref_table": "music_library.artist", "ref_column": "artist_id"}]
+
+
+def test_cross_database_query_through_attach_is_read_only(schema_manager):
+    conn = schema_manager.connect(["concert_singer", "music_library"])
+    try:
+        rows = conn.execute(
+            "SELECT s.name, al.title FROM concert_singer.singer AS s "
+            "JOIN music_library.artist AS ar ON ar.artist_name = s.name "
+            "JOIN music_library.album AS al ON al.artist_id = ar.artist_id"
+        ).fetchall()
+        assert rows == [("Joe Sharp", "Sharp Edges")]
+
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("INSERT INTO music_library.artist VALUES (3, 'Air', 'France')")
+    finally:
+        conn.close()
+
+
+def test_connect_rejects_unknown_and_invalid_databases(schema_manager):
+    with pytest.raises(FileNotFoundError):
+        schema_manager.connect(["concert_singer", "missing_db"])
+    with pytest.raises(ValueError):
+        schema_manager.connect(["concert_singer", "x; DROP TABLE singer"])
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from multisql.tools.example_store import ExampleStore, format_examples
+
+
+def log_line(question, sql, success=True, db_id="concert_singer"):
+    return json.dumps({
+        "nl_query": question, "generated_sql": sql, "db_id": db_id,
+        "tables_involved": ["singer"], "execution_success": success
+    }) + "\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExampleStore(str(tmp_path / "examples.jsonl"))
+
+
+def test_search_ranks_similar_questions_and_drops_unrelated_ones(store):
+    store.add("How many singers are there?", "SELECT count(*) FROM singer", "concert_singer")
+    store.add("How many albums are there?", "SELECT count(*) FROM album", "music_library")
+    store.add("List the names of all airports in France", "SELECT name FROM airport WHERE country = 'France'", "flights")
+
+    found = store.search("How many singers do we have?", k=3)
+
+    assert found[0]["sql"] == "SELECT count(*) FROM singer"
+    assert [e["score"] for e in found] == sorted((e["score"] for e in found), reverse=True)
+    assert all(e["score"] >= 0.2 for e in found)
+    assert "SELECT name FROM airport WHERE country = 'France'" not in [e["sql"] for e in found]
+    assert store.search("How many singers do we have?", k=3, min_score=0.99) == []
+
+
+def test_search_prefers_examples_from_the_same_database(store):
+    store.add("How many singers are there?", "SELECT count(*) FROM singer", "concert_singer")
+    store.add("How many singers are there?", "SELECT count(*) FROM performer", "orchestra")
+
+    assert store.search("How many singers are there?", k=1, db_id="orchestra")[0]["db_id"] == "orchestra"
+    assert store.search("How many singers are there?", k=1, db_id="concert_singer")[0]["db_id"] == "concert_singer"
+
+
+def test_add_skips_duplicates_and_persists(store):
+    assert store.add("How many singers?", "SELECT count(*) FROM singer", "concert_singer")
+    assert not store.add("how many  SINGERS?", "SELECT count(*) FROM singer", "concert_singer")
+
+    reloaded = ExampleStore(store.store_path)
+    assert [e["question"] for e in reloaded.examples] == ["How many singers?"]
+    assert "SQL: SELECT count(*) FROM singer" in format_examples(reloaded.examples)
+
+
+def test_harvest_resumes_from_the_saved_offset(store, tmp_path):
+    log_file = tmp_path / "performance_logs.jsonl"
+    log_file.write_text(log_line("How many singers?", "SELECT count(*) FROM singer")
+                        + log_line("Failed question", "SELECT nope", success=False))
+
+    assert store.harvest(str(log_file)) == 1
+
+    with open(log_file, "a") as f:
+        f.write(log_line("How many concerts?", "SELECT count(*) FROM concert"))
+        f.write('{"nl_query": "still being writ')
+    # A fresh store only reads the new complete line, not the first one again
+    fresh = ExampleStore(store.store_path)
+    assert fresh.harvest(str(log_file)) == 1
+    assert [e["question"] for e in fresh.examples] == ["How many singers?", "How many concerts?"]
+
+    with open(log_file, "a") as f:
+        f.write('ten"}\n')
+    assert fresh.harvest(str(log_file)) == 0
+
+
+@pytest.mark.parametrize("replace", ["truncate", "rotate"])
+def test_harvest_rereads_a_truncated_or_rotated_log(store, tmp_path, replace):
+    log_file = tmp_path / "performance_logs.jsonl"
+    log_file.write_text(log_line("How many singers?", "SELECT count(*) FROM singer") + log_line("How many concerts?", "SELECT count(*) FROM concert"))
+    assert store.harvest(str(log_file)) == 2
+
+    if replace == "truncate":
+        # Shorter than the saved offset
+        log_file.write_text(log_line("Oldest singer?", "SELECT max(age) FROM singer"))
+    else:
+        # Rotated: a new log that has already grown past the saved offset
+        log_file.rename(tmp_path / "performance_logs.jsonl.1")
+        log_file.write_text(log_line("Oldest singer?", "SELECT max(age) FROM singer")
+                            + log_line("Youngest singer?", "SELECT min(age) FROM singer") * 3)
+
+    added = store.harvest(str(log_file))
+
+    assert added == (1 if replace == "truncate" else 2)
+    assert "Oldest singer?" in [e["question"] for e in store.examples]
+
+
+def test_refresh_harvests_new_runs_at_most_once_per_interval(store, tmp_path):
+    log_file = tmp_path / "performance_logs.jsonl"
+    log_file.write_text(log_line("How many singers?", "SELECT count(*) FROM singer"))
+    assert store.refresh(str(log_file), min_interval=60) == 1
+
+    with open(log_file, "a") as f:
+        f.write(log_line("How many concerts?", "SELECT count(*) FROM concert"))
+    assert store.refresh(str(log_file), min_interval=60) == 0
+    assert store.refresh(str(log_file), min_interval=0) == 1
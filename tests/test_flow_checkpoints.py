@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+from multisql import flow as flow_module
+from multisql.flow import NL2SQLFlow
+from multisql.models.outputs import (
+    GeneratedSQL, JoinPath, QueryIntent, RelationshipAnalysis, SchemaElements, SchemaMatches
+)
+from multisql.models.state import DatabaseSchema, NL2SQLState
+from multisql.tools.checkpoint_store import CheckpointStore
+
+SCHEMA = DatabaseSchema(**{
+    "db_id": "concert_singer",
+    "tables": [
+        {"name": "singer", "columns": [{"name": "singer_id", "type": "int", "table": "singer"},
+                                       {"name": "age", "type": "int", "table": "singer"}]},
+        {"name": "concert", "columns": [{"name": "singer_id", "type": "int", "table": "concert"},
+                                        {"name": "year", "type": "int", "table": "concert"}]}
+    ]
+})
+
+
+def fake_crew(name, outputs, calls, failures):
+    """Crew class stub recording its kickoffs and failing while `failures[name]` is set"""
+    class FakeCrew:
+        def __init__(self, model=None):
+            pass
+
+        def crew(self):
+            return self
+
+        def kickoff(self, inputs):
+            calls.append(name)
+            if failures.get(name):
+                failures[name] -= 1
+                raise RuntimeError(f"{name} failed")
+            return SimpleNamespace(tasks_output=[
+                SimpleNamespace(pydantic=output, json_dict=None, raw="") for output in outputs
+            ])
+    return FakeCrew
+
+
+@pytest.fixture
+def crews(monkeypatch):
+    calls, failures = [], {}
+
+    def install(aggregation):
+        intent = QueryIntent(main_goal="average age of singers with concerts", aggregation=aggregation)
+        monkeypatch.setattr(flow_module, "NLUnderstandingCrew", fake_crew(
+            "nl_understanding", [intent, SchemaElements(tables=["singer", "concert"])], calls, failures
+        ))
+        monkeypatch.setattr(flow_module, "SchemaMatchingCrew", fake_crew("schema_matching", [
+            RelationshipAnalysis(joins=[JoinPath(from_table="concert", from_column="singer_id",
+                                                 to_table="singer", to_column="singer_id")]),
+            SchemaMatches(matches=[])
+        ], calls, failures))
+        monkeypatch.setattr(flow_module, "SQLGeneratorCrew", fake_crew(
+            "sql_generator", [GeneratedSQL(sql="SELECT avg(age) FROM singer JOIN concert USING (singer_id)")], calls, failures
+        ))
+        return calls, failures
+    return install
+
+
+def run(run_id, checkpoint_path):
+    state = NL2SQLState(
+        run_id=run_id,
+        checkpoint_path=checkpoint_path,
+        nl_query="What is the average age of singers with concerts?",
+        db_schema=SCHEMA,
+        example_store_path=None
+    )
+    flow = NL2SQLFlow()
+    return flow, flow.kickoff(inputs=state.model_dump())
+
+
+@pytest.mark.parametrize("aggregation, route, stage", [
+    (True, "route_to_enhanced", "schema_matching"),
+    (False, "route_to_standard", "route_processing"),
+])
+def test_resumed_run_skips_completed_stages(crews, tmp_path, aggregation, route, stage):
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+    calls, failures = crews(aggregation)
+    failures["sql_generator"] = 1
+
+    with pytest.raises(Exception):
+        run("run1", checkpoint_path)
+    expected_calls = ["nl_understanding", "schema_matching", "sql_generator"] if aggregation else \
+        ["nl_understanding", "sql_generator"]
+    assert calls == expected_calls
+    [saved] = CheckpointStore(checkpoint_path).list_runs()
+    assert (saved["run_id"], saved["stage"]) == ("run1", stage)
+
+    calls.clear()
+    flow, result = run("run1", checkpoint_path)
+
+    # Only the failed step runs again; the router takes the recorded branch
+    assert calls == ["sql_generator"]
+    assert flow.state.completed_stages["make_routing_decision"] == route
+    assert result["sql"] == "SELECT avg(age) FROM singer JOIN concert USING (singer_id)"
+    assert result["execution_path"].count("understand_query") == 1
+    assert ("enhanced_processing" in result["execution_path"]) == aggregation
+    assert ("standard_processing" in result["execution_path"]) != aggregation
+
+
+def test_completed_run_deletes_its_checkpoint(crews, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite")
+    calls, _ = crews(True)
+
+    flow, result = run("run2", checkpoint_path)
+
+    assert calls == ["nl_understanding", "schema_matching", "sql_generator"]
+    assert "validate_sql" in flow.state.completed_stages
+    assert CheckpointStore(checkpoint_path).load("run2") is None
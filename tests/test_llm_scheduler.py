@@ -0,0 +1,229 @@
+import threading
+import time
+
+import pytest
+
+from multisql.tools.llm_scheduler import (
+    LLMScheduler, Priority, SchedulerTimeout, TokenBucket, is_retryable_error, llm_priority, llm_usage
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def make_scheduler(clock, sleeps=None, **kwargs):
+    limits = {"primary": {"rpm": 600, "burst": 1}, "cheap": {"rpm": 600, "burst": 1}}
+
+    def sleep(seconds):
+        if sleeps is not None:
+            sleeps.append(seconds)
+        # A rate limit drains the bucket; backing off lets it refill
+        clock.advance(max(seconds, 0.1))
+
+    return LLMScheduler(limits=limits, sleep=sleep, clock=clock, **kwargs)
+
+
+def test_token_bucket_takes_up_to_capacity_then_reports_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert bucket.try_take() == 0
+
+
+def test_token_bucket_refill_is_capped_and_drain_empties_it():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=clock)
+
+    clock.advance(100)
+    for _ in range(3):
+        assert bucket.try_take() == 0
+    assert bucket.try_take() > 0
+
+    clock.advance(2)
+    bucket.drain()
+    assert bucket.try_take() == pytest.approx(1.0)
+
+
+def test_is_retryable_error():
+    assert is_retryable_error(RateLimitError())
+    assert is_retryable_error(type("APITimeoutError", (Exception,), {})())
+    assert not is_retryable_error(BadRequestError())
+    assert not is_retryable_error(ValueError("bad"))
+
+
+def test_interactive_calls_overtake_waiting_batch_calls():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.acquire("primary")  # empty the bucket
+    order = []
+
+    def run(name, priority):
+        with llm_priority(priority):
+            scheduler.submit("primary", lambda model: order.append(name))
+
+    batch = threading.Thread(target=run, args=("batch", Priority.BATCH))
+    batch.start()
+    while len(scheduler._waiters["primary"]) < 1:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=run, args=("interactive", Priority.INTERACTIVE))
+    interactive.start()
+    while len(scheduler._waiters["primary"]) < 2:
+        time.sleep(0.001)
+
+    # One token at a time: the head of the queue takes it
+    clock.advance(0.1)
+    while not order:
+        time.sleep(0.001)
+    assert order == ["interactive"]
+
+    clock.advance(0.1)
+    batch.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_acquire_times_out_when_the_bucket_stays_empty():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.acquire("primary")
+
+    with pytest.raises(SchedulerTimeout):
+        scheduler.acquire("primary", timeout=0)
+
+
+def test_retries_transient_errors_with_backoff():
+    clock = FakeClock()
+    sleeps = []
+    scheduler = make_scheduler(clock, sleeps, max_retries=3, base_delay=1.0, max_delay=4.0)
+    attempts = []
+
+    def call(model):
+        attempts.append(model)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "ok"
+
+    assert scheduler.submit("primary", call) == "ok"
+    assert attempts == ["primary"] * 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+    assert scheduler.stats()["primary"] == {
+        "calls": 3, "retries": 2, "fallbacks": 0, "failures": 0, "throttled": 0, "queue_time": 0
+    }
+
+
+def test_backoff_delay_is_bounded_and_honours_retry_after():
+    scheduler = LLMScheduler(base_delay=1.0, max_delay=5.0)
+
+    assert all(0 <= scheduler.backoff_delay(attempt) <= 5.0 for attempt in range(10))
+    assert scheduler.backoff_delay(0, RateLimitError(retry_after=7)) == 7.0
+
+
+def test_gives_up_after_max_retries_and_on_permanent_errors():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_retries=1)
+
+    def rate_limited(model):
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        scheduler.submit("primary", rate_limited)
+    assert scheduler.stats()["primary"]["calls"] == 2
+
+    def bad_request(model):
+        raise BadRequestError()
+
+    with pytest.raises(BadRequestError):
+        scheduler.submit("cheap", bad_request)
+    assert scheduler.stats()["cheap"] == {
+        "calls": 1, "retries": 0, "fallbacks": 0, "failures": 1, "throttled": 0, "queue_time": 0
+    }
+
+
+def test_falls_back_to_the_cheaper_model_when_the_primary_keeps_failing():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_retries=0)
+
+    def call(model):
+        if model == "primary":
+            raise RateLimitError()
+        return model
+
+    assert scheduler.submit("primary", call, fallback_model="cheap") == "cheap"
+    assert scheduler.stats()["primary"]["fallbacks"] == 1
+
+
+def test_falls_back_when_the_primary_is_saturated():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, fallback_after=0)
+    scheduler.acquire("primary")
+
+    assert scheduler.submit("primary", lambda model: model, fallback_model="cheap") == "cheap"
+
+
+def test_permanent_errors_do_not_fall_back():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    used = []
+
+    def call(model):
+        used.append(model)
+        raise BadRequestError()
+
+    with pytest.raises(BadRequestError):
+        scheduler.submit("primary", call, fallback_model="cheap")
+    assert used == ["primary"]
+
+
+def test_acquire_returns_the_time_spent_waiting():
+    # Real clock: the waiting happens on the scheduler's condition variable
+    scheduler = LLMScheduler(limits={"primary": {"rpm": 1200, "burst": 1}})
+
+    assert scheduler.acquire("primary") == 0
+    assert 0 < scheduler.acquire("primary") < 1
+
+
+def test_counters_are_kept_per_stage_and_collected_per_run():
+    scheduler = LLMScheduler(limits={"primary": {"rpm": 1200, "burst": 1}, "cheap": {"rpm": 1200, "burst": 5}})
+    usage = {}
+
+    with llm_usage(usage):
+        scheduler.submit("primary", lambda model: model, stage="sql_composer")
+        scheduler.submit("primary", lambda model: model, stage="sql_composer")
+    scheduler.submit("cheap", lambda model: model, stage="intent_analyzer")
+    scheduler.submit("cheap", lambda model: model)
+
+    # The second call waited for the bucket to refill
+    composer = usage["sql_composer"]
+    assert list(usage) == ["sql_composer"]
+    assert (composer["calls"], composer["throttled"], composer["retries"], composer["failures"]) == (2, 1, 0, 0)
+    assert 0 < composer["queue_time"] < 1
+    stages = scheduler.stage_stats()
+    assert stages["sql_composer"] == composer
+    assert stages["intent_analyzer"]["calls"] == 1 and stages["intent_analyzer"]["throttled"] == 0
+    assert scheduler.stats()["cheap"]["calls"] == 2
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+import yaml
+
+from multisql.tools.llm_scheduler import DEFAULT_CONFIG_PATH
+from multisql.tools.model_tiering import ModelTiering
+from multisql.tools.performance_tracker import PerformanceTracker
+
+CONFIG = {
+    # Deliberately not in cost order
+    "tiers": {
+        "large": {"model": "openai/gpt-4"},
+        "small": {"model": "openai/gpt-4o-mini", "max_complexity": 3.5},
+        "medium": {"model": "openai/gpt-4o", "max_complexity": 6.5},
+    },
+    "stages": {"understand_query": "large", "schema_matching": "auto", "sql_generation": "auto"},
+    "tiering": {"large_for_nesting": True, "large_min_joins": 2},
+}
+
+
+@pytest.fixture
+def tiering():
+    return ModelTiering(tiers=CONFIG["tiers"], stages=CONFIG["stages"], **CONFIG["tiering"])
+
+
+def test_tiers_are_ordered_cheapest_first(tiering):
+    assert [name for name, _ in tiering.tiers] == ["small", "medium", "large"]
+    assert tiering.largest_tier == "large"
+
+
+@pytest.mark.parametrize("score, tier", [(0.0, "small"), (3.5, "small"), (3.6, "medium"), (6.5, "medium"), (9.0, "large")])
+def test_select_tier_by_complexity_threshold(tiering, score, tier):
+    assert tiering.select_tier(score) == tier
+
+
+def test_nesting_and_joins_bump_to_the_largest_tier(tiering):
+    assert tiering.select_tier(1.0, intent={"nesting": True}) == "large"
+    assert tiering.select_tier(1.0, joins_needed=2) == "large"
+    assert tiering.select_tier(1.0, intent={"nesting": False}, joins_needed=1) == "small"
+
+    lenient = ModelTiering(tiers=CONFIG["tiers"], large_for_nesting=False, large_min_joins=None)
+    assert lenient.select_tier(1.0, intent={"nesting": True}, joins_needed=5) == "small"
+
+
+def test_scores_above_every_bound_are_capped_at_the_largest_tier():
+    bounded = ModelTiering(tiers={"small": {"model": "a", "max_complexity": 3}, "large": {"model": "b", "max_complexity": 6}})
+
+    assert bounded.select_tier(10.0) == "large"
+
+
+def test_select_pins_configured_stages_and_tiers_the_rest(tiering):
+    assert tiering.select("understand_query", complexity_score=0.0) == ("large", "openai/gpt-4")
+    assert tiering.select("sql_generation", complexity_score=5.0) == ("medium", "openai/gpt-4o")
+    # Stages missing from the config are tiered too
+    assert tiering.select("validate_sql", complexity_score=1.0) == ("small", "openai/gpt-4o-mini")
+
+
+def test_from_config_reads_tiers_stages_and_overrides(tmp_path):
+    config_path = tmp_path / "llm.yaml"
+    config_path.write_text(yaml.safe_dump({**CONFIG, "tiering": {"large_min_joins": 3}}))
+
+    tiering = ModelTiering.from_config(str(config_path))
+
+    assert tiering.select_tier(1.0, joins_needed=2) == "small"
+    assert tiering.select_tier(1.0, joins_needed=3) == "large"
+
+
+def test_shipped_config_pins_understand_query_to_large():
+    tiering = ModelTiering.from_config(DEFAULT_CONFIG_PATH)
+
+    assert tiering.select("understand_query", complexity_score=0.0)[0] == tiering.largest_tier == "large"
+
+
+def test_no_tiers_is_an_error():
+    with pytest.raises(ValueError):
+        ModelTiering(tiers={})
+
+
+def test_analyze_tier_performance(tmp_path):
+    log_file = tmp_path / "performance_logs.jsonl"
+    logs = [
+        {"model_tiers": {"understand_query": "large", "sql_generation": "small"},
+         "execution_time": {"understand_query": 2.0, "standard_processing": 1.0}, "execution_success": True},
+        {"model_tiers": {"understand_query": "large", "sql_generation": "small"},
+         "execution_time": {"understand_query": 4.0, "standard_processing": 3.0}, "execution_success": False},
+        {"model_tiers": {"understand_query": "large", "sql_generation": "large"},
+         "execution_time": {"understand_query": 3.0, "sql_generation_enhanced": 5.0}},
+    ]
+    log_file.write_text("".join(json.dumps(log) + "\n" for log in logs))
+
+    tiers = PerformanceTracker(log_file=str(log_file)).analyze_tier_performance()
+
+    small = tiers["small"]["sql_generation"]
+    assert (small["count"], small["avg_latency"], small["success_rate"]) == (2, 2.0, 0.5)
+    large = tiers["large"]
+    assert (large["understand_query"]["count"], large["understand_query"]["avg_latency"]) == (3, 3.0)
+    assert large["sql_generation"]["avg_latency"] == 5.0 and large["sql_generation"]["success_rate"] is None
+    assert PerformanceTracker(log_file=str(tmp_path / "missing.jsonl")).analyze_tier_performance() is None
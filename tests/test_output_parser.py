@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from multisql.models.outputs import GeneratedSQL, QueryIntent, SchemaMatches
+from multisql.tools.output_parser import parse_output, repair_json, task_output
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"sql": "SELECT 1"}', {"sql": "SELECT 1"}),
+    ('```json\n{"sql": "SELECT 1"}\n```', {"sql": "SELECT 1"}),
+    ('Final Answer: here it is {"sql": "SELECT 1"} hope it helps', {"sql": "SELECT 1"}),
+    ('{"tables": ["singer", "concert",],}', {"tables": ["singer", "concert"]}),
+    ("{'distinct': True, 'conditions': None}", {"distinct": True, "conditions": None}),
+    ("{'distinct': true, 'conditions': null}", {"distinct": True, "conditions": None}),
+    ('{"tables": ["singer", "concert"', {"tables": ["singer", "concert"]}),
+    ('{"sql": "SELECT \'{\' FROM t"}', {"sql": "SELECT '{' FROM t"}),
+])
+def test_repair_json(text, expected):
+    assert repair_json(text) == expected
+
+
+@pytest.mark.parametrize("text", ["SELECT 1", '{"sql": "SELECT 1', "{'a': }"])
+def test_repair_json_raises_when_nothing_can_be_recovered(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
+
+
+def test_parse_output_validates_the_model():
+    intent = parse_output('{"main_goal": "count singers", "aggregation": true}', QueryIntent)
+
+    assert intent.main_goal == "count singers"
+    assert intent.aggregation and not intent.nesting
+
+
+def test_parse_output_wraps_a_bare_list_into_the_list_field():
+    matches = parse_output('[{"phrase": "age", "table": "singer", "column": "age", "confidence": 90}]', SchemaMatches)
+
+    assert matches.matches[0].table == "singer"
+    assert matches.matches[0].confidence == pytest.approx(0.9)
+
+
+def test_parse_output_rejects_answers_not_matching_the_model():
+    with pytest.raises(ValueError):
+        parse_output('{"aggregation": true}', QueryIntent)
+    with pytest.raises(ValueError):
+        parse_output('["SELECT 1"]', GeneratedSQL)
+
+
+def test_task_output_prefers_converted_output_and_falls_back_to_raw():
+    converted = SimpleNamespace(pydantic=GeneratedSQL(sql="SELECT 1"), json_dict=None, raw="")
+    as_dict = SimpleNamespace(pydantic=None, json_dict={"sql": "SELECT 2"}, raw="")
+    raw_only = SimpleNamespace(pydantic=None, json_dict=None, raw='```json\n{"sql": "SELECT 3",}\n```')
+    crew_output = SimpleNamespace(tasks_output=[converted, as_dict, raw_only])
+
+    assert [task_output(crew_output, i, GeneratedSQL).sql for i in range(3)] == ["SELECT 1", "SELECT 2", "SELECT 3"]
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+
+import pytest
+
+from multisql.tools.query_plan_analyzer import QueryPlanAnalyzer, format_plan_report
+
+
+@pytest.fixture
+def analyzer(spider_dir):
+    return QueryPlanAnalyzer(spider_dir)
+
+
+def test_full_scan_filtered_on_unindexed_column_gets_an_index_suggestion(analyzer):
+    report = analyzer.explain("concert_singer", "SELECT name FROM singer WHERE country = 'France';")
+
+    assert report["full_scans"] == [{"table": "singer", "estimated_rows": 3}]
+    [index] = report["missing_indexes"]
+    assert index["columns"] == ["country"]
+    assert index["suggestion"] == "CREATE INDEX idx_singer_country ON singer (country)"
+
+
+def test_no_suggestion_once_the_filter_column_is_indexed(analyzer, spider_dir):
+    conn = sqlite3.connect(os.path.join(spider_dir, "concert_singer", "concert_singer.sqlite"))
+    conn.execute("CREATE INDEX idx_singer_country ON singer (country)")
+    conn.close()
+
+    report = analyzer.explain("concert_singer", "SELECT name FROM singer WHERE country = 'France'")
+
+    assert report["full_scans"] == [] and report["missing_indexes"] == []
+
+
+def test_automatic_index_is_reported_as_missing(analyzer):
+    report = analyzer.explain("concert_singer", "SELECT T1.name FROM concert AS T2 JOIN singer AS T1 ON T1.age = T2.year")
+
+    assert any("AUTOMATIC" in step["detail"] for step in report["plan"])
+    assert {"table": "singer", "columns": ["age"], "reason": "SQLite builds a temporary automatic index on every run",
+            "suggestion": "CREATE INDEX idx_singer_age ON singer (age)"} in report["missing_indexes"]
+
+
+def test_temp_btrees_for_group_by_and_order_by(analyzer):
+    report = analyzer.explain("concert_singer", "SELECT country, count(*) FROM singer GROUP BY country ORDER BY count(*) DESC")
+
+    assert report["temp_btrees"] == ["GROUP BY", "ORDER BY"]
+
+
+def test_aliases_resolve_to_table_names(analyzer):
+    report = analyzer.explain(
+        "concert_singer",
+        "SELECT s.name, c.year FROM singer AS s JOIN concert AS c ON c.singer_id = s.singer_id WHERE c.year = 2014"
+    )
+
+    assert [scan["table"] for scan in report["full_scans"]] == ["concert"]
+    assert [(index["table"], index["columns"]) for index in report["missing_indexes"]] == [("concert", ["singer_id"])]
+
+
+def test_integer_primary_key_lookup_needs_no_index(analyzer):
+    report = analyzer.explain("concert_singer", "SELECT name FROM singer WHERE singer_id = 3")
+
+    assert report["full_scans"] == [] and report["missing_indexes"] == []
+
+
+def test_format_plan_report(analyzer):
+    text = format_plan_report(analyzer.explain(
+        "concert_singer", "SELECT country, count(*) FROM singer WHERE age > 30 GROUP BY country"
+    ))
+
+    assert text.startswith("Query plan:\n  SCAN singer")
+    assert "Full table scans:\n  singer (~3 rows)" in text
+    assert "CREATE INDEX idx_singer_age ON singer (age);  -- full table scan filtered on unindexed column" in text
+    assert "Temporary B-trees for: GROUP BY" in text
+
+    assert "No full table scans." in format_plan_report(analyzer.explain("concert_singer", "SELECT name FROM singer WHERE singer_id = 1"))
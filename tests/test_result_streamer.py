@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from multisql.tools.result_streamer import ColumnBatch, QueryStream
+
+NUMBERS = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {count}) SELECT i, 'row' || i AS label FROM n"
+# Aggregates over a billion rows, so the first fetch runs until interrupted
+SLOW = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000000) SELECT count(*) FROM n"
+
+
+def connect():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+def test_column_batch_layout():
+    batch = ColumnBatch.from_rows(["id", "score", "name"], [(1, 1.5, "a"), (2, 2, None)], offset=10)
+
+    assert batch.num_rows == 2
+    assert batch.types == ["int64", "double", "string"]
+    assert batch.rows() == [(1, 1.5, "a"), (2, 2, None)]
+    assert batch.to_dict()["data"] == {"id": [1, 2], "score": [1.5, 2], "name": ["a", None]}
+
+
+def test_streams_all_rows_in_batches():
+    stream = QueryStream(connect(), NUMBERS.format(count=25), batch_size=10)
+
+    batches = list(stream)
+
+    assert [batch.num_rows for batch in batches] == [10, 10, 5]
+    assert [batch.offset for batch in batches] == [0, 10, 20]
+    assert batches[0].columns == ["i", "label"]
+    assert stream.summary()["rows"] == 25 and stream.truncated is None
+
+
+def test_max_rows_truncates_only_when_rows_remain():
+    capped = QueryStream(connect(), NUMBERS.format(count=25), batch_size=10, max_rows=15)
+    assert sum(batch.num_rows for batch in capped) == 15
+    assert capped.truncated == "max_rows"
+
+    exact = QueryStream(connect(), NUMBERS.format(count=15), batch_size=10, max_rows=15)
+    assert sum(batch.num_rows for batch in exact) == 15
+    assert exact.truncated is None
+
+
+def test_max_bytes_stops_the_stream():
+    stream = QueryStream(connect(), NUMBERS.format(count=1000), batch_size=10, max_bytes=100)
+
+    batches = list(stream)
+
+    assert len(batches) == 1
+    assert stream.truncated == "max_bytes"
+
+
+def test_wide_rows_shrink_the_batches():
+    sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20) SELECT i, zeroblob(1000) FROM n"
+    stream = QueryStream(connect(), sql, batch_size=10, max_batch_bytes=5000)
+
+    sizes = [batch.num_rows for batch in stream]
+
+    assert sizes[0] == 10
+    assert max(sizes[1:]) <= 5
+
+
+def test_cancel_interrupts_a_running_fetch():
+    stream = QueryStream(connect(), SLOW)
+    threading.Timer(0.1, stream.cancel).start()
+
+    assert stream.next_batch() is None
+    assert stream.truncated == "cancelled"
+    assert stream.next_batch() is None
+
+
+def test_timeout_interrupts_a_slow_fetch():
+    stream = QueryStream(connect(), SLOW, timeout=0.1)
+
+    assert stream.next_batch() is None
+    assert stream.truncated == "timeout"
+
+
+def test_closing_releases_an_owned_connection():
+    conn = connect()
+    stream = QueryStream(conn, NUMBERS.format(count=5))
+    list(stream)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+    shared = connect()
+    list(QueryStream(shared, NUMBERS.format(count=5), close_connection=False))
+    assert shared.execute("SELECT 1").fetchone() == (1,)
+
+
+def test_async_iteration():
+    async def collect():
+        return [batch.num_rows async for batch in QueryStream(connect(), NUMBERS.format(count=25), batch_size=10)]
+
+    assert asyncio.run(collect()) == [10, 10, 5]
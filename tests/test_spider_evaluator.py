@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from multisql.tools.spider_evaluator import (
+    attach_predictions, classify_hardness, exact_set_match, normalize_sql, results_match, sql_components
+)
+
+
+def test_normalize_sql_masks_values_and_spacing():
+    assert normalize_sql("SELECT name FROM singer WHERE age>30 AND country = 'France';") == \
+        "select name from singer where age > value and country = value"
+    assert normalize_sql("SELECT count( * ),max(age) FROM singer") == normalize_sql("select count(*), max(age) from singer")
+
+
+def test_sql_components_resolve_aliases_and_split_clauses():
+    components = sql_components(
+        "SELECT T1.name FROM singer AS T1 JOIN concert AS T2 ON T1.id = T2.singer_id WHERE T2.year = 2014"
+    )
+
+    assert components["select"] == frozenset({"singer.name"})
+    assert components["from"] == frozenset({"singer", "concert", "on singer.id = concert.singer_id"})
+    assert components["where"] == frozenset({"concert.year = value", "and"})
+
+
+@pytest.mark.parametrize("gold, predicted", [
+    ("select a from t where x = 1", "select a from t where x=1"),
+    ("select a from t where x >= 1 and y <> 2", "select a from t where y<>2 and x>=1"),
+    ("select a, b from t", "SELECT b, a FROM t"),
+    ("select a from t order by x", "select a from t order by x asc"),
+    ("select a from t where name = 'x'", "select a from t where name = 'y'"),
+    ("select t.a from t join u on t.id = u.id", "select T1.a from t as T1 join u as T2 on T1.id=T2.id"),
+])
+def test_exact_set_match_ignores_formatting_and_order(gold, predicted):
+    assert exact_set_match(gold, predicted)
+
+
+@pytest.mark.parametrize("gold, predicted", [
+    ("select a from t order by x", "select a from t order by x desc"),
+    ("select a from t where x = 1 and y = 2", "select a from t where x = 1 or y = 2"),
+    ("select a from t where x > 1", "select a from t where x >= 1"),
+    ("select a from t", "select a from u"),
+])
+def test_exact_set_match_detects_differences(gold, predicted):
+    assert not exact_set_match(gold, predicted)
+
+
+@pytest.mark.parametrize("sql, hardness", [
+    ("SELECT count(*) FROM singer", "easy"),
+    ("SELECT name FROM singer WHERE age > 30 ORDER BY age", "medium"),
+    ("SELECT name FROM singer WHERE age > (SELECT avg(age) FROM singer)", "hard"),
+    ("SELECT name FROM singer WHERE age > 30 INTERSECT SELECT name FROM singer WHERE country = 'France'", "hard"),
+    ("SELECT T1.name FROM singer AS T1 JOIN concert AS T2 ON T1.id = T2.singer_id "
+     "WHERE T2.year = 2014 GROUP BY T1.name ORDER BY count(*) DESC LIMIT 1", "extra"),
+])
+def test_classify_hardness(sql, hardness):
+    assert classify_hardness(sql) == hardness
+
+
+def test_results_match_respects_order_only_when_required():
+    gold = {"rows": [[1, "a"], [2, "b"]], "error": None}
+    reordered = {"rows": [[2, "b"], [1, "a"]], "error": None}
+    swapped_columns = {"rows": [["a", 1], ["b", 2]], "error": None}
+
+    assert results_match(gold, reordered, ordered=False)
+    assert not results_match(gold, reordered, ordered=True)
+    assert results_match(gold, swapped_columns, ordered=True)
+    assert not results_match(gold, {"rows": None, "error": "no such table"}, ordered=False)
+
+
+def test_attach_predictions_counts_nested_stage_timings_once(tmp_path):
+    log = {
+        "db_id": "concert_singer",
+        "nl_query": "How many singers are there?",
+        "generated_sql": "SELECT count(*) FROM singer",
+        "execution_path": ["understand_query", "enhanced_processing"],
+        "execution_time": {
+            "understand_query": 1.0,
+            "schema_matching": 2.0,
+            "sql_generation_enhanced": 3.0,
+            "example_retrieval": 0.5,
+            "enhanced_processing": 5.0
+        }
+    }
+    predictions_path = tmp_path / "performance_logs.jsonl"
+    predictions_path.write_text(json.dumps(log) + "\n")
+
+    [example] = attach_predictions(
+        [{"db_id": "concert_singer", "question": "How many singers are there?", "gold": "SELECT count(*) FROM singer"}],
+        str(predictions_path)
+    )
+
+    assert example["predicted"] == "SELECT count(*) FROM singer"
+    assert example["route"] == "route_to_enhanced"
+    assert example["latency"] == pytest.approx(6.0)
+
+
+def test_attach_predictions_matches_runs_by_database_and_question(tmp_path):
+    question = "How many heads of the departments are older than 56?"
+    logs = [
+        {"db_id": "department_management", "nl_query": question, "generated_sql": "SELECT count(*) FROM head WHERE age > 56",
+         "execution_path": ["standard_processing"], "execution_time": {"standard_processing": 1.0}},
+        {"db_id": "school_admin", "nl_query": question, "generated_sql": "SELECT count(*) FROM dean WHERE age > 56",
+         "execution_path": ["enhanced_processing"], "execution_time": {"enhanced_processing": 2.0}},
+    ]
+    predictions_path = tmp_path / "performance_logs.jsonl"
+    predictions_path.write_text("".join(json.dumps(log) + "\n" for log in logs))
+
+    examples = attach_predictions([
+        {"db_id": "department_management", "question": question, "gold": ""},
+        {"db_id": "school_admin", "question": question, "gold": ""},
+        {"db_id": "concert_singer", "question": question, "gold": ""},
+    ], str(predictions_path))
+
+    assert [(e["predicted"], e.get("route")) for e in examples] == [
+        ("SELECT count(*) FROM head WHERE age > 56", "route_to_standard"),
+        ("SELECT count(*) FROM dean WHERE age > 56", "route_to_enhanced"),
+        ("", None),
+    ]